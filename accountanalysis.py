@@ -1,10 +1,15 @@
+import numpy as np
 import pandas as pd
 import graphmetrics
+from mailindex import MailIndex
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 
-def filter_df_for_poi(df, poi):
+def filter_df_for_poi(df, poi, mail_index=None):
+    # mit einem mailindex.MailIndex von df (z.B. aus dem Cache der App) ohne alle Zeilen zu durchsuchen
+    if mail_index is not None:
+        return mail_index.of_account(poi)
     df_poi = df[(df["From"] == poi) | (df["To"] == poi)]
     return df_poi
 
@@ -25,23 +30,44 @@ def create_timeline(df, col_name):
     return timeline
 
 
-def get_contacts_with_count(df_poi, poi, contacts_of_poi):
-    contacts_with_count = pd.DataFrame(columns=["contact", "sent", "recieved"])
-
-    for contact in contacts_of_poi:
-        poi_to_contact = len(graphmetrics.filter_person(df=df_poi, pers1=poi, pers2=contact))
-        contact_to_poi = len(graphmetrics.filter_person(df=df_poi, pers1=contact, pers2=poi))
-
-        contacts_with_count = contacts_with_count.append({"contact": contact, "sent": poi_to_contact, "recieved": contact_to_poi}, ignore_index=True)
+def get_contacts_with_count(df_poi, poi, contacts_of_poi, mail_index=None):
+    # Gesendete und empfangene Mails für alle Kontakte auf einmal: Empfänger der gesendeten
+    # und Absender der empfangenen Mails werden über die Codes des Mail-Index von df_poi gezählt
+    if mail_index is None:
+        mail_index = MailIndex(df_poi)
+    n_accounts = len(mail_index.accounts)
+    sent = np.bincount(mail_index.to_codes[mail_index.sent_positions(poi)], minlength=n_accounts)
+    recieved = np.bincount(mail_index.from_codes[mail_index.received_positions(poi)], minlength=n_accounts)
+
+    contacts = list(contacts_of_poi)
+    codes = mail_index.accounts.get_indexer(contacts)
+    found = codes >= 0
+    contacts_with_count = pd.DataFrame(
+        {
+            "contact": contacts,
+            "sent": np.where(found, sent[codes], 0),
+            "recieved": np.where(found, recieved[codes], 0),
+        }
+    )
     return contacts_with_count
 
 
-def show_account_information(df, account_name):
-    print("Anzahl gesendeter E-Mails:", len(df[df["From"] == account_name].drop_duplicates("Date")))
-    print("Anzahl empfangener E-Mails:", len(df[df["To"] == account_name].drop_duplicates("Date")))
-    print("Erste gesendete E-Mail:", df[df["From"] == account_name]["Date"].min().date())
-    print("Letzte gesendete E-Mail:", df[df["From"] == account_name]["Date"].max().date())
-    df_poi = filter_df_for_poi(df=df, poi=account_name)
+def show_account_information(df, account_name, mail_index=None):
+    # Gesendete und empfangene Mails aus dem Index von df, ohne Index wird jede Spalte nur einmal verglichen
+    if mail_index is not None:
+        sent = mail_index.sent(account_name)
+        recieved = mail_index.received(account_name)
+        df_poi = mail_index.of_account(account_name)
+    else:
+        is_sent = df["From"] == account_name
+        is_recieved = df["To"] == account_name
+        sent = df[is_sent]
+        recieved = df[is_recieved]
+        df_poi = df[is_sent | is_recieved]
+    print("Anzahl gesendeter E-Mails:", len(sent.drop_duplicates("Date")))
+    print("Anzahl empfangener E-Mails:", len(recieved.drop_duplicates("Date")))
+    print("Erste gesendete E-Mail:", sent["Date"].min().date())
+    print("Letzte gesendete E-Mail:", sent["Date"].max().date())
     print("Anzahl Kontakte:", len(get_contacts_of_poi(df=df_poi, poi=account_name)))
 
 
@@ -78,17 +104,20 @@ def get_daily_distribution(df_poi, poi):
     return df_time
 
 
-def plot_communication_with_contacts(df_poi, poi, contacts_with_count, n_contacts, timeline, sent):
+def plot_communication_with_contacts(df_poi, poi, contacts_with_count, n_contacts, timeline, sent, mail_index=None):
     # show communication distribution of poi with top X contacts
+    # Die Mails je Kontakt kommen aus einem Index von df_poi, statt df_poi für jeden Kontakt zu durchsuchen
+    if mail_index is None:
+        mail_index = MailIndex(df_poi)
 
     fig, ax = plt.subplots()
 
     for contact in contacts_with_count.sort_values("sent", ascending=False)["contact"][:n_contacts]:
 
         if sent:
-            filtered_df = graphmetrics.filter_person(df=df_poi, pers1=poi, pers2=contact)
+            filtered_df = graphmetrics.filter_person(df=df_poi, pers1=poi, pers2=contact, mail_index=mail_index)
         else:
-            filtered_df = graphmetrics.filter_person(df=df_poi, pers1=contact, pers2=poi)
+            filtered_df = graphmetrics.filter_person(df=df_poi, pers1=contact, pers2=poi, mail_index=mail_index)
 
         cum_contact_time_series = get_cumulated_elements_per_day(df_raw=filtered_df, timeline=timeline)
 
@@ -97,11 +126,12 @@ def plot_communication_with_contacts(df_poi, poi, contacts_with_count, n_contact
     return fig
 
 
-def get_cumulated_contact_time_series(df_poi, poi, contact, timeline):
+def get_cumulated_contact_time_series(df_poi, poi, contact, timeline, mail_index=None):
+    # mit mail_index, einem Index von df_poi für alle Kontakte (z.B. aus dem Cache der App), wird df_poi nicht durchsucht
     cum_contact_time_series = pd.DataFrame(index=timeline)
 
-    poi_to_contact = graphmetrics.filter_person(df=df_poi, pers1=poi, pers2=contact)
-    contact_to_poi = graphmetrics.filter_person(df=df_poi, pers1=contact, pers2=poi)
+    poi_to_contact = graphmetrics.filter_person(df=df_poi, pers1=poi, pers2=contact, mail_index=mail_index)
+    contact_to_poi = graphmetrics.filter_person(df=df_poi, pers1=contact, pers2=poi, mail_index=mail_index)
 
     cum_contact_time_series[poi] = get_cumulated_elements_per_day(df_raw=poi_to_contact, timeline=timeline)
     cum_contact_time_series[contact] = get_cumulated_elements_per_day(df_raw=contact_to_poi, timeline=timeline)
@@ -0,0 +1,55 @@
+"""
+Runtime of counting co-occurrences (cooccurrence.CooccurrenceCounter, as in textgraph.create_word_network) depending on the window co_range.
+Texts are random Zipf-distributed tokens, so the script needs no data set:
+
+    python benchmarks/bench_cooccurrence.py --texts 5000 --length 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cooccurrence import CooccurrenceCounter  # noqa: E402
+
+
+def random_texts(n_texts, length, vocabulary, seed=0):
+    """Returns n_texts lists of about **length** tokens, word ranks are Zipf distributed."""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n_texts):
+        ranks = rng.zipf(1.3, size=rng.integers(length // 2, length * 3 // 2 + 1)) % vocabulary
+        texts.append([f"w{r}" for r in ranks.tolist()])
+    return texts
+
+
+def split_sentences(text, size=15):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=150, help="average number of tokens per text")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--ranges", default="1,2,5,10,20,50,100,document,sentence")
+    args = parser.parse_args()
+
+    texts = random_texts(args.texts, args.length, args.vocabulary)
+    print(f"{args.texts} texts, {sum(map(len, texts))} tokens")
+    print(f"{'co_range':>10} {'seconds':>8} {'links':>10}")
+    for co_range in args.ranges.split(","):
+        co_range = int(co_range) if co_range.isdigit() else co_range
+        docs = [split_sentences(t) for t in texts] if co_range == "sentence" else texts
+
+        start = time.perf_counter()
+        counter = CooccurrenceCounter(co_range=co_range)
+        counter.add_documents(docs)
+        network = counter.to_network()
+        seconds = time.perf_counter() - start
+        print(f"{co_range!s:>10} {seconds:8.2f} {network.number_of_edges():>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Runtime of distinctiveness centrality on a random weighted graph with 100k+ links:
+centrality.distinctiveness_centrality on the networkx Graph and on the sparse WordNetwork,
+and the distinctiveness package for comparison, if it is installed.
+
+    python benchmarks/bench_distinctiveness.py --nodes 20000 --edges 150000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import centrality  # noqa: E402
+from cooccurrence import WordNetwork, symmetric_matrix, standardize  # noqa: E402
+
+try:
+    from distinctiveness import dc
+except ImportError:
+    dc = None
+
+MEASURES = ["D1", "D2", "D3", "D4", "D5"]
+
+
+def random_network(n_nodes, n_edges, seed=0):
+    """Returns a WordNetwork with about n_edges distinct links between random nodes and weights 1 - 20."""
+    rng = np.random.default_rng(seed)
+    keys = np.unique(np.sort(rng.integers(0, n_nodes, size=(n_edges, 2)), axis=1), axis=0)
+    weights = symmetric_matrix(rows=keys[:, 0], cols=keys[:, 1], data=rng.integers(1, 21, size=len(keys)), n=n_nodes)
+    counts = rng.integers(1, 100, size=n_nodes)
+    return WordNetwork(tokens=[f"w{i}" for i in range(n_nodes)], counts=counts, prevalence=standardize(counts), weights=weights)
+
+
+def timed(label, f):
+    start = time.perf_counter()
+    result = f()
+    print(f"{label:<40} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--edges", type=int, default=150000)
+    parser.add_argument("--alpha", type=float, default=2)
+    args = parser.parse_args()
+
+    network = random_network(args.nodes, args.edges)
+    G = timed("WordNetwork.to_graph", network.to_graph)
+    print(f"{G.number_of_nodes()} nodes, {G.number_of_edges()} links")
+
+    timed("centrality, WordNetwork", lambda: centrality.distinctiveness_centrality(network, alpha=args.alpha, measures=MEASURES))
+    ours = timed("centrality, networkx Graph", lambda: centrality.distinctiveness_centrality(G, alpha=args.alpha, measures=MEASURES))
+    if dc is None:
+        print("distinctiveness is not installed, no comparison")
+        return
+
+    theirs = timed("distinctiveness.dc", lambda: dc.distinctiveness(G, alpha=args.alpha, measures=MEASURES))
+    for measure in MEASURES:
+        a = np.array([ours[measure][v] for v in G])
+        b = np.array([theirs[measure][v] for v in G])
+        print(f"{measure}: max relative difference {np.max(np.abs(a - b) / np.maximum(np.abs(b), 1e-300)):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Render time and resident memory of the ego graph plot of keyword_app over repeated reruns.
+Each rerun recommends a minimum weight, draws the ego graph of a word with textgraph.get_figure_ego_of_word
+and saves it as png, like the app does on every interaction. Words and weights cycle, so cached layouts are hit as well.
+With --pyplot the figure is created with pyplot and never closed, as the app did before.
+
+    python benchmarks/bench_ego_render.py --reruns 100
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import textgraph  # noqa: E402
+
+
+def resident_mb():
+    """Current resident memory of the process in MB, from /proc (Linux) or the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def random_texts(n_texts, length, vocabulary, seed=0):
+    rng = np.random.default_rng(seed)
+    return [[f"w{r}" for r in (rng.zipf(1.3, size=length) % vocabulary).tolist()] for _ in range(n_texts)]
+
+
+def render(G, node, min_weight, pyplot):
+    if pyplot:
+        fig, ax = plt.subplots(figsize=(20, 15))
+        textgraph._draw_ego_of_word(G, node, ax=ax, min_weight=min_weight)
+    else:
+        fig = textgraph.get_figure_ego_of_word(G=G, node=node, radius=1, min_weight=min_weight)
+    fig.savefig(io.BytesIO(), format="png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=100)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=5, help="number of words the reruns cycle through")
+    parser.add_argument("--pyplot", action="store_true", help="create figures with pyplot without closing them")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        G = textgraph.create_wcn(random_texts(args.texts, 60, 5000), co_range=2, link_filter=2)
+    words = sorted(G, key=G.degree, reverse=True)[: args.words]
+    print(f"{G.number_of_nodes()} words, {G.number_of_edges()} links, start {resident_mb():.0f} MB")
+
+    times = []
+    step = max(1, args.reruns // 4)
+    for i in range(args.reruns):
+        node = words[i % len(words)]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            recommendation = textgraph.recommend_min_weight(G=G, node=node, radius=1)
+            render(G, node, recommendation + (i // len(words)) % 3, args.pyplot)
+        times.append(time.perf_counter() - start)
+        if (i + 1) % step == 0:
+            print(f"rerun {i + 1:>4}: {1000 * np.mean(times[-step:]):7.1f} ms per rerun, {resident_mb():6.0f} MB resident")
+
+    print(f"median {1000 * np.median(times):.1f} ms, first {1000 * times[0]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import heapq
+import weakref
+import numpy as np
+from cooccurrence import WordNetwork, graph_version, symmetric_matrix
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def adjacency(G, weight="weight"):
+    """
+    Returns the nodes and the symmetric weighted adjacency matrix (csr, float64) of an undirected graph.
+    G can be a networkx Graph (missing weights count as 1) or a cooccurrence.WordNetwork.
+    """
+    if isinstance(G, WordNetwork):
+        return G.tokens, G.weights.astype(np.float64)
+
+    nodes = list(G)
+    index = {node: i for i, node in enumerate(nodes)}
+    rows, cols, data = [], [], []
+    for u, v, w in G.edges.data(weight, default=1):
+        rows.append(index[u])
+        cols.append(index[v])
+        data.append(w)
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    data = np.array(data, dtype=np.float64)
+    return nodes, symmetric_matrix(rows=rows, cols=cols, data=data, n=len(nodes))
+
+
+def node_list(G):
+    """Returns the nodes of a networkx Graph or the words of a cooccurrence.WordNetwork, in the order of adjacency."""
+    if isinstance(G, WordNetwork):
+        return G.tokens
+    return list(G)
+
+
+# Distance matrices per graph and weight attribute, dropped together with the graph
+_distance_cache = weakref.WeakKeyDictionary()
+
+
+def inverse_distances(G, weight="weight"):
+    """
+    Returns the nodes and the csr matrix of distances 1 / weight (1 for a weight of 0) of the links of G.
+    For a networkx Graph, the matrix is built once per graph version (see cooccurrence.graph_version) and reused while G exists,
+    the weights of a WordNetwork are inverted directly. G itself is not changed.
+    """
+    if isinstance(G, WordNetwork):
+        return _inverted(*adjacency(G))
+
+    version = graph_version(G)
+    cached = _distance_cache.setdefault(G, {})
+    if weight in cached and cached[weight][0] == version:
+        return cached[weight][1]
+
+    nodes, A = _inverted(*adjacency(G, weight=weight))
+    cached[weight] = (version, (nodes, A))
+    return nodes, A
+
+
+def _inverted(nodes, A):
+    A.data = np.divide(1, A.data, out=np.ones_like(A.data), where=A.data != 0)
+    return nodes, A
+
+
+def distinctiveness_centrality(G, alpha=1, normalize=False, measures=("D2",)):
+    """
+    Calculates Distinctiveness Centrality of an undirected graph, like distinctiveness.dc.distinctiveness,
+    but on the sparse adjacency matrix and only for the requested measures.
+    G can be a networkx Graph or a cooccurrence.WordNetwork. Returns a dict of measure -> {node: value}.
+    """
+    nodes, A = adjacency(G)
+    DC = distinctiveness_arrays(A, alpha=alpha, normalize=normalize, measures=measures)
+    return {measure: dict(zip(nodes, values.tolist())) for measure, values in DC.items()}
+
+
+def distinctiveness_arrays(A, alpha=1, normalize=False, measures=("D2",)):
+    """
+    Calculates Distinctiveness Centrality (D1 - D5) from the symmetric weighted adjacency matrix **A**.
+    alpha is a number or a list of 5 values, one per measure.
+    Returns a dict of measure -> array of values, aligned with the rows of A.
+
+    Loops are treated as in distinctiveness.dc, which announces to ignore them but keeps them:
+    a loop is two link ends of its node (as in the networkx degree), its weight enters the
+    weighted sums of D3 and D4 once, or twice for alpha = 1 (weighted degree).
+    """
+    alphas = alpha if isinstance(alpha, (list, tuple)) else [alpha] * 5
+    if len(alphas) != 5:
+        raise ValueError("alpha must be a single number or a list of 5 values.")
+
+    n = A.shape[0]
+    if n < 3:
+        raise ValueError("Graph must have at least 3 nodes.")
+    n1 = n - 1
+
+    # One entry per link end: links are stored in both directions, loops once on the diagonal, so they are repeated
+    A = A.tocsr()
+    rows = np.repeat(np.arange(n), np.diff(A.indptr))
+    loops = A.indices == rows
+    loop_nodes = rows[loops]
+    loop_w = A.data[loops].astype(np.float64)
+    rows = np.concatenate([rows, loop_nodes])
+    cols = np.concatenate([A.indices, loop_nodes])
+    w = np.concatenate([A.data.astype(np.float64), loop_w])
+
+    deg = np.bincount(rows, minlength=n).astype(np.float64)
+    has_edges = len(w) > 0
+    if any(a < 1 for a in alphas) or not has_edges:
+        normalize = False
+    if has_edges:
+        maxwij = w.max()
+        minwij = w.min()
+
+    DC = {}
+    # Each term belongs to the row node u and depends on the column node v of a link
+    if "D1" in measures:
+        DC["D1"] = np.bincount(rows, weights=w * np.log10(n1 / deg[cols] ** alphas[0]), minlength=n)
+        if normalize:
+            D1max = np.log10(n1) * n1 * maxwij
+            D1min = (1 - alphas[0]) * maxwij * np.log10(n1) * n1
+            DC["D1"] = (DC["D1"] - D1min) / (D1max - D1min)
+
+    if "D2" in measures:
+        DC["D2"] = np.bincount(rows, weights=np.log10(n1 / deg[cols] ** alphas[1]), minlength=n)
+        if normalize:
+            D2max = np.log10(n1) * n1
+            D2min = (1 - alphas[1]) * np.log10(n1) * n1
+            DC["D2"] = (DC["D2"] - D2min) / (D2max - D2min)
+
+    if "D3" in measures:
+        totalWEI = w.sum() / 2
+        wei_sum_alpha = _weighted_sum(rows, w, alphas[2], loop_nodes, loop_w, n)
+        DC["D3"] = np.bincount(rows, weights=w * np.log10(totalWEI / (wei_sum_alpha[cols] - w ** alphas[2] + 1)), minlength=n)
+        if normalize:
+            D3max = np.log10(maxwij * (n1 + 1) * n1 * 0.5) * maxwij * n1
+            threshold = (n1 - 1) * (maxwij ** alphas[2] - maxwij)
+            if (minwij - 1) > threshold:
+                D3min = 0
+            else:
+                D3min = n1 * maxwij * np.log10(((n1 - 1) * maxwij + minwij) / ((n1 - 1) * maxwij ** alphas[2] + 1))
+            DC["D3"] = (DC["D3"] - D3min) / (D3max - D3min)
+
+    if "D4" in measures:
+        wei_sum_alpha = _weighted_sum(rows, w, alphas[3], loop_nodes, loop_w, n)
+        DC["D4"] = np.bincount(rows, weights=w * (w ** alphas[3] / wei_sum_alpha[cols]), minlength=n)
+        if normalize:
+            DC["D4"] = DC["D4"] / (n1 * maxwij)
+
+    if "D5" in measures:
+        DC["D5"] = np.bincount(rows, weights=1 / deg[cols] ** alphas[4], minlength=n)
+        if normalize:
+            DC["D5"] = DC["D5"] / n1
+
+    return DC
+
+
+def _weighted_sum(rows, w, a, loop_nodes, loop_w, n):
+    """Sums weight ** a of the links of each node, loops count once unless a = 1."""
+    wei_sum_alpha = np.bincount(rows, weights=w ** a, minlength=n)
+    if a != 1:
+        np.subtract.at(wei_sum_alpha, loop_nodes, loop_w ** a)
+    return wei_sum_alpha
+
+
+def betweenness_centrality(G, weight="weight", normalized=True, inverse=False, sources=None):
+    """
+    Calculates betweenness centrality like networkx.betweenness_centrality, with Brandes' algorithm on the
+    csr arrays of the adjacency matrix. Link weights are distances, with **inverse** the distance is 1 / weight
+    (or 1 for a weight of 0). With **sources** only the shortest paths from these nodes are summed up,
+    like networkx.betweenness_centrality_subset to all nodes.
+    G can be a networkx Graph or a cooccurrence.WordNetwork. Compiled with numba if it is installed
+    (requirements-optional.txt), otherwise the same kernel runs as plain python, which is much slower.
+    """
+    nodes, A = inverse_distances(G, weight=weight) if inverse else adjacency(G, weight=weight)
+    n = len(nodes)
+    if sources is None:
+        source_ids = np.arange(n, dtype=np.int64)
+    else:
+        index = {node: i for i, node in enumerate(nodes)}
+        source_ids = np.array([index[s] for s in sources], dtype=np.int64)
+
+    betweenness = betweenness_arrays(A.indptr, A.indices, A.data, source_ids)
+
+    # Rescale like networkx for undirected graphs
+    if normalized:
+        if n > 2:
+            betweenness *= 1 / ((n - 1) * (n - 2))
+    else:
+        betweenness *= 0.5
+    return dict(zip(nodes, betweenness.tolist()))
+
+
+def betweenness_arrays(indptr, indices, distances, sources):
+    """
+    Sums up the dependencies of all nodes on the shortest paths from **sources** (Brandes' algorithm).
+    The graph is given by the csr arrays indptr, indices and the distance of each entry.
+    Returns the array of unscaled betweenness values, each undirected path is counted from both ends.
+    """
+    n = len(indptr) - 1
+    if numba is not None:
+        betweenness = np.zeros(n)
+        _brandes(
+            indptr.astype(np.int64),
+            indices.astype(np.int64),
+            distances.astype(np.float64),
+            sources.astype(np.int64),
+            betweenness,
+            np.full(n, np.inf),
+            np.zeros(n),
+            np.zeros(n),
+            np.zeros(n, dtype=np.bool_),
+            np.zeros(n, dtype=np.int64),
+        )
+        return betweenness
+
+    # Without numba, python lists are faster to index than numpy arrays
+    betweenness = [0.0] * n
+    _brandes(
+        indptr.tolist(),
+        indices.tolist(),
+        distances.astype(np.float64).tolist(),
+        sources.tolist(),
+        betweenness,
+        [np.inf] * n,
+        [0.0] * n,
+        [0.0] * n,
+        [False] * n,
+        [0] * n,
+    )
+    return np.array(betweenness)
+
+
+def _brandes(indptr, indices, distances, sources, betweenness, dist, sigma, delta, settled, order):
+    """Dijkstra from each source with a binary heap, then dependency accumulation. The work arrays are reset after each source."""
+    for s in sources:
+        dist[s] = 0.0
+        sigma[s] = 1.0
+        n_settled = 0
+        heap = [(0.0, s)]
+        while len(heap) > 0:
+            d, v = heapq.heappop(heap)
+            if settled[v]:
+                continue
+            settled[v] = True
+            order[n_settled] = v
+            n_settled += 1
+            for e in range(indptr[v], indptr[v + 1]):
+                w = indices[e]
+                if settled[w]:
+                    # Count the shortest paths over each predecessor
+                    if v != s and d == dist[w] + distances[e]:
+                        sigma[v] += sigma[w]
+                    continue
+                vw_dist = d + distances[e]
+                if vw_dist < dist[w]:
+                    dist[w] = vw_dist
+                    heapq.heappush(heap, (vw_dist, w))
+
+        # Accumulate dependencies in order of decreasing distance
+        for i in range(n_settled - 1, -1, -1):
+            w = order[i]
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for e in range(indptr[w], indptr[w + 1]):
+                v = indices[e]
+                if settled[v] and v != w and dist[v] + distances[e] == dist[w]:
+                    delta[v] += sigma[v] * coeff
+            if w != s:
+                betweenness[w] += delta[w]
+
+        for i in range(n_settled):
+            v = order[i]
+            dist[v] = np.inf
+            sigma[v] = 0.0
+            delta[v] = 0.0
+            settled[v] = False
+
+
+if numba is not None:
+    _brandes = numba.njit(cache=True)(_brandes)
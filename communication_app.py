@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 import accountanalysis as acc
+from mailindex import MailIndex
 
 
 # ------------------ settings --------------------
@@ -20,12 +21,22 @@ def load_data(uploaded_file, col=0):
     return df
 
 
+@st.cache(allow_output_mutation=True, max_entries=4)
+def get_mail_index(df):
+    # Index der Absender und Empfänger, einmal pro geladener Datei und pro df_poi eines Accounts;
+    # st.cache erkennt geänderte Daten am Inhalt von df
+    return MailIndex(df)
+
+
 def get_account_information(df, account_name):
-    n_send = len(df[df["From"] == account_name].drop_duplicates("Date"))
-    n_recieved = len(df[df["To"] == account_name].drop_duplicates("Date"))
-    date_first_mail = df[df["From"] == account_name]["Date"].min().date()
-    date_last_mail = df[df["From"] == account_name]["Date"].max().date()
-    df_poi = acc.filter_df_for_poi(df=df, poi=account_name)
+    # gesendete und empfangene Mails aus dem Index, ohne alle Zeilen zu durchsuchen
+    mail_index = get_mail_index(df)
+    df_sent = mail_index.sent(account_name)
+    n_send = len(df_sent.drop_duplicates("Date"))
+    n_recieved = len(mail_index.received(account_name).drop_duplicates("Date"))
+    date_first_mail = df_sent["Date"].min().date()
+    date_last_mail = df_sent["Date"].max().date()
+    df_poi = mail_index.of_account(account_name)
     n_contacts = len(acc.get_contacts_of_poi(df=df_poi, poi=account_name))
 
     st.write("Anzahl gesendeter E-Mails:", n_send)
@@ -43,8 +54,11 @@ def create_timeline(df, col_name):
 
 @st.cache
 def create_communication_timeline(df, poi, timeline):
-    df_poi_sent = df[df["From"] == poi][~df[df["From"] == poi].index.duplicated(keep="first")]
-    df_poi_recieved = df[df["To"] == poi][~df[df["To"] == poi].index.duplicated(keep="first")]
+    mail_index = get_mail_index(df)
+    df_poi_sent = mail_index.sent(poi)
+    df_poi_sent = df_poi_sent[~df_poi_sent.index.duplicated(keep="first")]
+    df_poi_recieved = mail_index.received(poi)
+    df_poi_recieved = df_poi_recieved[~df_poi_recieved.index.duplicated(keep="first")]
 
     com_time_series = pd.DataFrame(index=timeline)
 
@@ -55,14 +69,14 @@ def create_communication_timeline(df, poi, timeline):
 
 @st.cache
 def get_df_poi(df, poi):
-    df_poi = acc.filter_df_for_poi(df=df, poi=poi).drop_duplicates("Date")
+    df_poi = acc.filter_df_for_poi(df=df, poi=poi, mail_index=get_mail_index(df)).drop_duplicates("Date")
     return df_poi
 
 
 @st.cache
 def get_contacts_of_poi(df_poi, poi):
     contacts_of_poi = acc.get_contacts_of_poi(df=df_poi, poi=poi)
-    contacts_with_count = acc.get_contacts_with_count(df_poi=df_poi, poi=poi, contacts_of_poi=contacts_of_poi)
+    contacts_with_count = acc.get_contacts_with_count(df_poi=df_poi, poi=poi, contacts_of_poi=contacts_of_poi, mail_index=get_mail_index(df_poi))
     return contacts_with_count.sort_values(by="sent", ascending=False)
 
 
@@ -145,7 +159,7 @@ with st.container():
 
         # show contacts with count
         st.subheader(f"Kumulierte {kind_of_mail} E-Mail Kommunikation zwischen dem E-Mail Account und seinen Top {n_contacts} Kontakten")
-        fig_contacts = acc.plot_communication_with_contacts(df_poi=df_poi, poi=poi, contacts_with_count=contacts_with_count, n_contacts=n_contacts, timeline=timeline, sent=sent)
+        fig_contacts = acc.plot_communication_with_contacts(df_poi=df_poi, poi=poi, contacts_with_count=contacts_with_count, n_contacts=n_contacts, timeline=timeline, sent=sent, mail_index=get_mail_index(df_poi))
 
         fig_contacts.set_figwidth(20)
         fig_contacts.set_figheight(10)
@@ -159,7 +173,7 @@ with st.container():
         st.subheader("Wähle einen Kontakt zu weiteren Analyse")
         # contacts = contacts_of_poi = acc.get_contacts_of_poi(df=df_poi, poi=poi)
         contact = st.selectbox("Wähle einen Kontakt:", contacts_with_count["contact"])
-        cum_contact_time_series = acc.get_cumulated_contact_time_series(df_poi=df_poi, poi=poi, contact=contact, timeline=timeline)
+        cum_contact_time_series = acc.get_cumulated_contact_time_series(df_poi=df_poi, poi=poi, contact=contact, timeline=timeline, mail_index=get_mail_index(df_poi))
 
         fig_contact, ax_contact = plt.subplots()
 
@@ -0,0 +1,359 @@
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from collections import Counter
+
+
+WINDOW_DOCUMENT = "document"
+WINDOW_SENTENCE = "sentence"
+
+# Graph attribute that counts the changes of a graph, see graph_version
+VERSION = "version"
+
+
+class Vocabulary:
+    """Interns tokens as consecutive int ids, in order of first occurrence."""
+
+    def __init__(self, tokens=()):
+        self.tokens = []
+        self.index = {}
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return token in self.index
+
+    def add(self, token):
+        """Returns the id of **token**, new tokens get the next free id."""
+        try:
+            return self.index[token]
+        except KeyError:
+            self.index[token] = len(self.tokens)
+            self.tokens.append(token)
+            return len(self.tokens) - 1
+
+    def add_all(self, tokens):
+        """Returns the ids of all **tokens**."""
+        return [self.add(t) for t in tokens]
+
+
+class CooccurrenceCounter:
+    """
+    Running accumulator for word occurrences and co-occurrences.
+    Documents are added one at a time, so memory is bounded by the vocabulary and its word pairs,
+    not by the size of the corpus. Words are counted by their vocabulary id, a pair of ids (i <= j)
+    is packed into a single int key.
+
+    co_range defines the window in which words co-occur, separately for each document:
+    a number k links each word with the next k words, 0 or "document" links all words of a document
+    and "sentence" links all words of a sentence. For "sentence", each document is a list of
+    tokenized sentences, see clean_texts(..., sentences=True).
+    """
+
+    def __init__(self, co_range=0):
+        self.co_range = check_co_range(co_range)
+        self.vocabulary = Vocabulary()
+        self.counts = Counter()
+        self.weights = Counter()
+        self.n_documents = 0
+
+    def add_document(self, doc):
+        """Adds the occurrences and co-occurrences of a tokenized document."""
+        units = self._units(doc)
+        self.n_documents += 1
+
+        for ids in units:
+            self.counts.update(ids)
+            self._add_pairs(ids, self.weights)
+
+    def _units(self, doc):
+        """Returns the word ids of each part of a document in which words co-occur: its sentences or the whole document."""
+        if self.co_range == WINDOW_SENTENCE:
+            for sentence in doc:
+                # A flat list of tokens would be counted character by character
+                if not isinstance(sentence, (list, tuple)):
+                    raise ValueError(f"co_range='{WINDOW_SENTENCE}' needs each document as list of tokenized sentences, see clean_texts(..., sentences=True), not {sentence!r}")
+            return [self.vocabulary.add_all(sentence) for sentence in doc]
+        return [self.vocabulary.add_all(doc)]
+
+    def _add_pairs(self, ids, weights):
+        """Adds the co-occurrences of the word ids of one document or sentence to **weights**."""
+        if self.co_range in (WINDOW_DOCUMENT, WINDOW_SENTENCE) or self.co_range >= len(ids) - 1:
+            self._add_document_pairs(ids, weights)
+        else:
+            self._add_window_pairs(ids, self.co_range, weights)
+
+    @staticmethod
+    def _add_window_pairs(ids, co_range, weights):
+        """Links each word with the next **co_range** words, O(len(doc) * co_range)."""
+        for k, w in enumerate(ids):
+            for p in ids[k + 1 : k + co_range + 1]:
+                weights[(w << 32) | p if w <= p else (p << 32) | w] += 1
+
+    @staticmethod
+    def _add_document_pairs(ids, weights):
+        """
+        Links all words of the document with each other.
+        Every pair of positions counts once, so two distinct words co-occur count(u) * count(v) times
+        and a word with itself count(u) * (count(u) - 1) / 2 times. Costs O(distinct words ** 2) instead of O(len(doc) ** 2).
+        """
+        counts = list(Counter(ids).items())
+        for i, (u, cu) in enumerate(counts):
+            if cu > 1:
+                weights[(u << 32) | u] += cu * (cu - 1) // 2
+            for v, cv in counts[i + 1 :]:
+                weights[(u << 32) | v if u <= v else (v << 32) | u] += cu * cv
+
+    def add_documents(self, docs):
+        """Adds each tokenized document of an iterable, e.g. a generator of cleaned texts."""
+        for doc in docs:
+            self.add_document(doc)
+
+    def to_network(self):
+        """Returns the counted, unfiltered co-occurrences as WordNetwork."""
+        n = len(self.vocabulary)
+        counts = np.zeros(n, dtype=np.int64)
+        counts[np.fromiter(self.counts.keys(), dtype=np.int64, count=len(self.counts))] = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+
+        keys = np.fromiter(self.weights.keys(), dtype=np.int64, count=len(self.weights))
+        data = np.fromiter(self.weights.values(), dtype=np.int64, count=len(self.weights))
+        weights = symmetric_matrix(rows=keys >> 32, cols=keys & 0xFFFFFFFF, data=data, n=n)
+
+        return WordNetwork(tokens=self.vocabulary.tokens, counts=counts, prevalence=standardize(counts), weights=weights)
+
+    def to_graph(self):
+        """Returns the unfiltered Word Co-Occurrence Graph with the standardized prevalence of each word."""
+        return self.to_network().to_graph()
+
+
+class IncrementalWordNetwork(CooccurrenceCounter):
+    """
+    Word Co-Occurrence Network to which documents can be added and from which they can be removed without recounting.
+    Each document is kept as int32 array of its word ids, so its counts can be subtracted again.
+    The filtered Graph (links >= link_filter, without isolates) is updated in place, an update costs time
+    proportional to the added or removed documents, not to the corpus.
+    """
+
+    def __init__(self, co_range=0, link_filter=2):
+        super().__init__(co_range=co_range)
+        self.link_filter = link_filter
+        self.documents = {}
+        self.graph = nx.Graph()
+        bump_version(self.graph)
+        self._next_id = 0
+
+    def add_document(self, doc):
+        """Adds a tokenized document and returns its id."""
+        units = [np.array(ids, dtype=np.int32) for ids in self._units(doc)]
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self.documents[doc_id] = units
+        self._update(units, sign=1)
+        return doc_id
+
+    def add_documents(self, docs):
+        """Adds each tokenized document and returns their ids."""
+        return [self.add_document(doc) for doc in docs]
+
+    def remove_documents(self, ids):
+        """Removes the documents with the given ids. Raises KeyError, without removing any, if an id is unknown or repeated."""
+        ids = list(ids)
+        unknown = [doc_id for doc_id in ids if doc_id not in self.documents]
+        if unknown or len(set(ids)) < len(ids):
+            raise KeyError(f"Unknown or repeated document ids: {unknown or ids}")
+
+        for doc_id in ids:
+            self._update(self.documents.pop(doc_id), sign=-1)
+
+    def _update(self, units, sign):
+        """Adds (sign=1) or subtracts (sign=-1) the counts of a document and updates the links of the Graph."""
+        self.n_documents += sign
+
+        counts = Counter()
+        weights = Counter()
+        for ids in units:
+            ids = ids.tolist()
+            counts.update(ids)
+            self._add_pairs(ids, weights)
+
+        for i, count in counts.items():
+            self.counts[i] += sign * count
+            if self.counts[i] == 0:
+                del self.counts[i]
+
+        tokens = self.vocabulary.tokens
+        for key, weight in weights.items():
+            old = self.weights[key]
+            new = old + sign * weight
+            if new:
+                self.weights[key] = new
+            else:
+                del self.weights[key]
+            self._update_link(tokens[key >> 32], tokens[key & 0xFFFFFFFF], old, new)
+        bump_version(self.graph)
+
+    def _update_link(self, u, v, old, new):
+        """Adds, updates or removes the link between u and v in the Graph, words without links are removed."""
+        if new >= self.link_filter:
+            self.graph.add_edge(u, v, weight=new)
+        elif old >= self.link_filter:
+            self.graph.remove_edge(u, v)
+            for w in (u, v):
+                if w in self.graph and self.graph.degree(w) == 0:
+                    self.graph.remove_node(w)
+
+    def set_link_filter(self, link_filter):
+        """Re-thresholds the Graph with a new minimum co-occurrence, without recounting."""
+        self.link_filter = link_filter
+        self.graph = nx.Graph()
+        bump_version(self.graph)
+        tokens = self.vocabulary.tokens
+        self.graph.add_weighted_edges_from((tokens[key >> 32], tokens[key & 0xFFFFFFFF], weight) for key, weight in self.weights.items() if weight >= link_filter)
+
+    def get_wcn(self):
+        """
+        Returns the filtered Word Co-Occurrence Graph (not a copy).
+        Its version (see graph_version) is counted up with each update, so results cached for the Graph are recalculated.
+        The standardized prevalence depends on the counts of all words, so it is refreshed on request.
+        """
+        counts = np.fromiter(self.counts.values(), dtype=np.int64, count=len(self.counts))
+        avgPR = np.mean(counts)
+        stdPR = np.std(counts)
+
+        index = self.vocabulary.index
+        nx.set_node_attributes(self.graph, {w: (self.counts[index[w]] - avgPR) / stdPR for w in self.graph}, "prevalence")
+        return self.graph
+
+    def to_network(self):
+        """Returns the counted, unfiltered co-occurrences of the current documents as WordNetwork."""
+        network = super().to_network()
+
+        # Words of removed documents stay in the vocabulary with a count of 0
+        network = network.subnetwork(np.flatnonzero(network.counts))
+        network.prevalence = standardize(network.counts)
+        return network
+
+
+class WordNetwork:
+    """
+    Word Co-Occurrence Network as sparse matrix.
+    Word i is row and column i of the symmetric co-occurrence matrix **weights** (csr, self-links on the diagonal),
+    **counts** and **prevalence** hold the occurrences and the standardized prevalence of each word.
+    """
+
+    def __init__(self, tokens, counts, prevalence, weights):
+        self.tokens = list(tokens)
+        self.counts = counts
+        self.prevalence = prevalence
+        self.weights = weights
+
+    def number_of_nodes(self):
+        return len(self.tokens)
+
+    def number_of_edges(self):
+        # Each link is stored twice, except self-links on the diagonal
+        return (self.weights.nnz + np.count_nonzero(self.weights.diagonal())) // 2
+
+    def filter(self, link_filter=2, remove_isolates=True):
+        """
+        Returns a new WordNetwork with only links above the minimum co-occurrence threshold and optionally without isolates.
+        The network itself is unchanged, so it can be filtered again with another threshold without recounting.
+        """
+        weights = masked_matrix(self.weights, self.weights.data >= link_filter)
+
+        if not remove_isolates:
+            return WordNetwork(tokens=self.tokens, counts=self.counts, prevalence=self.prevalence, weights=weights)
+
+        # Words with a self-link only are no isolates, as in networkx
+        keep = np.flatnonzero(np.diff(weights.indptr))
+        return self.subnetwork(keep, weights=weights)
+
+    def subnetwork(self, ids, weights=None):
+        """Returns the WordNetwork of the words with the given ids."""
+        weights = self.weights if weights is None else weights
+        return WordNetwork(
+            tokens=[self.tokens[i] for i in ids],
+            counts=self.counts[ids],
+            prevalence=self.prevalence[ids],
+            weights=weights[ids][:, ids],
+        )
+
+    def to_graph(self, link_filter=None, remove_isolates=False):
+        """
+        Materializes the network as networkx Graph, e.g. for plotting. Nodes are added in order of decreasing prevalence.
+        With link_filter, links below the threshold are pruned while materializing, without a filtered copy of the matrix.
+        """
+        weights = self.weights
+        rows = np.repeat(np.arange(len(self.tokens)), np.diff(weights.indptr))
+        # Each link once, from the upper triangle
+        keep = weights.indices >= rows
+        if link_filter is not None:
+            keep &= weights.data >= link_filter
+        rows, cols, data = rows[keep], weights.indices[keep], weights.data[keep]
+
+        order = np.argsort(-self.counts, kind="stable")
+        if remove_isolates:
+            linked = np.zeros(len(self.tokens), dtype=bool)
+            linked[rows] = True
+            linked[cols] = True
+            order = order[linked[order]]
+
+        G = nx.Graph()
+        tokens = self.tokens
+        G.add_nodes_from((tokens[i], {"prevalence": p}) for i, p in zip(order.tolist(), self.prevalence[order].tolist()))
+        G.add_weighted_edges_from((tokens[u], tokens[v], w) for u, v, w in zip(rows.tolist(), cols.tolist(), data.tolist()))
+
+        return G
+
+
+def graph_version(G):
+    """
+    Returns the version of the networkx Graph G in O(1), for caches of results derived from G: the number of
+    in-place changes counted in G.graph["version"] by bump_version, 0 for a graph that was never changed.
+    The Graph of an IncrementalWordNetwork counts its own updates. Code that changes another graph in place
+    after results for it were cached has to call bump_version(G), otherwise the cached results are returned.
+    """
+    return G.graph.get(VERSION, 0)
+
+
+def bump_version(G):
+    """Counts up the version of G after an in-place change, graphs without version start counting."""
+    G.graph[VERSION] = G.graph.get(VERSION, 0) + 1
+
+
+def symmetric_matrix(rows, cols, data, n):
+    """Returns the symmetric n x n csr matrix of the upper triangle entries (rows <= cols)."""
+    off_diagonal = rows != cols
+    return sparse.csr_matrix(
+        (
+            np.concatenate([data, data[off_diagonal]]),
+            (np.concatenate([rows, cols[off_diagonal]]), np.concatenate([cols, rows[off_diagonal]])),
+        ),
+        shape=(n, n),
+    )
+
+
+def masked_matrix(matrix, mask):
+    """Returns a csr matrix with only the entries of **matrix** where **mask** is set, the other entries are not copied."""
+    indptr = np.concatenate([[0], np.cumsum(mask)])[matrix.indptr]
+    return sparse.csr_matrix((matrix.data[mask], matrix.indices[mask], indptr), shape=matrix.shape)
+
+
+def standardize(values):
+    """Returns the z-scores of an array."""
+    return (values - np.mean(values)) / np.std(values)
+
+
+def check_co_range(co_range):
+    """Validates the co-occurrence window, 0 is the same as "document"."""
+    if co_range == 0:
+        return WINDOW_DOCUMENT
+    if co_range in (WINDOW_DOCUMENT, WINDOW_SENTENCE):
+        return co_range
+    if isinstance(co_range, int) and co_range > 0:
+        return co_range
+    raise ValueError(f"co_range must be a positive number, 0, '{WINDOW_DOCUMENT}' or '{WINDOW_SENTENCE}', not {co_range!r}")
@@ -1,7 +1,18 @@
 from multiprocessing import Pool
+import atexit
+import functools
 import itertools
+import math
+import os
+import pickle
+import random
+import time
+import weakref
+import numpy as np
 import networkx as nx
 import pandas as pd
+import centrality
+from cooccurrence import WordNetwork, graph_version
 
 
 def _calculate_metrics(G, metrics_dict, graph_metrics):
@@ -70,29 +81,201 @@ def chunks(l, n):
         yield x
 
 
+# Graphs with fewer nodes are calculated serially, a process pool does not pay off for them
+PARALLEL_MIN_NODES = 500
+
+
+class BetweennessPool:
+    """
+    Persistent process pool for betweenness centrality.
+    The graph is sent to each worker only once, when the pool is started for it,
+    so repeated calls on the same graph only send chunks of source nodes. A different graph or a new version of the graph
+    (see cooccurrence.graph_version and bump_version) restarts the workers. The pool holds only a weak reference to its graph.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count()
+        self._pool = None
+        self._graph = None
+        self._version = None
+
+    def betweenness_centrality(self, G, weight, normalized=True):
+        """Calculates betweenness centrality of G, each worker sums up the shortest paths from a chunk of source nodes."""
+        return self.betweenness_of_sources(G, list(G), weight=weight, normalized=normalized)
+
+    def betweenness_of_sources(self, G, sources, weight, normalized=False):
+        """Calculates the betweenness centrality of G over the shortest paths from **sources** to all nodes."""
+        pool = self._pool_for(G)
+
+        # Adaptive chunks: about 4 per process, but at least one node each
+        n_chunks = min(len(sources), self.processes * 4)
+        node_chunks = list(chunks(sources, math.ceil(len(sources) / n_chunks)))
+        bt_sc = pool.starmap(_betweenness_of_sources, [(chunk, normalized, weight) for chunk in node_chunks])
+
+        # Reduce the partial solutions
+        bt_c = bt_sc[0]
+        for bt in bt_sc[1:]:
+            for n in bt:
+                bt_c[n] += bt[n]
+        return bt_c
+
+    def _pool_for(self, G):
+        version = graph_version(G)
+        if self._pool is None or self._graph() is not G or self._version != version:
+            self.close()
+            # The pool keeps its initargs to restart workers, pickled they do not keep G alive
+            self._pool = Pool(processes=self.processes, initializer=_init_worker, initargs=(pickle.dumps(G, protocol=pickle.HIGHEST_PROTOCOL),))
+            self._graph = weakref.ref(G)
+            self._version = version
+        return self._pool
+
+    def close(self):
+        """Stops the workers."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+        self._graph = None
+        self._version = None
+
+
+_pools = {}
+
+
+def get_betweenness_pool(processes=None):
+    """Returns the shared BetweennessPool for the given number of processes."""
+    if processes not in _pools:
+        _pools[processes] = BetweennessPool(processes=processes)
+    return _pools[processes]
+
+
+@atexit.register
+def close_betweenness_pools():
+    """Stops the workers of all shared pools."""
+    for pool in _pools.values():
+        pool.close()
+
+
+# Graph of a worker process, set once by the pool initializer
+_worker_graph = None
+_worker_targets = None
+
+
+def _init_worker(data):
+    global _worker_graph, _worker_targets
+    G = pickle.loads(data)
+    _worker_graph = G
+    _worker_targets = list(G)
+
+
+def _betweenness_of_sources(sources, normalized, weight):
+    return nx.betweenness_centrality_subset(_worker_graph, sources, _worker_targets, normalized, weight)
+
+
 def betweenness_centrality_parallel(G, weight, normalized=True, processes=None):
-    """Parallel betweenness centrality  function"""
-    p = Pool(processes=processes)
-    node_divisor = len(p._pool) * 4
-    node_chunks = list(chunks(G.nodes(), int(G.order() / node_divisor)))
-    num_chunks = len(node_chunks)
-    bt_sc = p.starmap(
-        nx.betweenness_centrality_subset,
-        zip(
-            [G] * num_chunks,
-            node_chunks,
-            [list(G)] * num_chunks,
-            [normalized] * num_chunks,
-            [weight] * num_chunks,
-        ),
-    )
-
-    # Reduce the partial solutions
-    bt_c = bt_sc[0]
-    for bt in bt_sc[1:]:
-        for n in bt:
-            bt_c[n] += bt[n]
-    return bt_c
+    """
+    Parallel betweenness centrality function, using a persistent pool of processes.
+    Graphs with fewer than PARALLEL_MIN_NODES nodes are calculated serially.
+    """
+    if processes == 1 or G.order() < PARALLEL_MIN_NODES:
+        return nx.betweenness_centrality(G, normalized=normalized, weight=weight)
+
+    return get_betweenness_pool(processes).betweenness_centrality(G, weight=weight, normalized=normalized)
+
+
+def inverse_weight(u, v, data, weight="weight"):
+    """Distance of a link for shortest paths: 1 / weight, or 1 for a missing weight or a weight of 0. Can be passed as weight to networkx."""
+    w = data.get(weight, 0)
+    return 1 / w if w != 0 else 1
+
+
+def approximate_betweenness_centrality(
+    G,
+    weight,
+    normalized=True,
+    k=None,
+    epsilon=None,
+    delta=0.1,
+    time_budget=None,
+    adaptive=False,
+    min_correlation=0.99,
+    batch_size=None,
+    parallel=False,
+    processes=None,
+    seed=None,
+    backend="networkx",
+    inverse=False,
+):
+    """
+    Estimates betweenness centrality from the shortest paths of randomly sampled pivot nodes.
+    The number of pivots is limited by k, by the error **epsilon** of the normalized values (with probability 1 - delta)
+    and by **time_budget** in seconds. Pivots are processed in batches, with **adaptive** sampling stops as soon as the
+    rank correlation of the estimates between two batches reaches **min_correlation**.
+    With time_budget, a first batch of one pivot (one per process in parallel) measures the time per pivot and each further
+    batch is sized to take at most half of the remaining time, so sampling stops before the budget is used up.
+    With backend "csr" the batches run on the arrays of centrality.betweenness_arrays instead of networkx (not in parallel),
+    G can then also be a cooccurrence.WordNetwork. With **inverse** the distance of a link is 1 / weight, see inverse_weight.
+    """
+    start = time.perf_counter()
+    nodes = centrality.node_list(G)
+    n = len(nodes)
+    pivots = list(nodes)
+    random.Random(seed).shuffle(pivots)
+
+    if epsilon is not None:
+        # Hoeffding bound for all n nodes at once
+        k_epsilon = math.ceil(math.log(2 * n / delta) / (2 * epsilon ** 2))
+        k = k_epsilon if k is None else min(k, k_epsilon)
+    if k is not None:
+        pivots = pivots[:k]
+    if batch_size is None:
+        batch_size = max(10, math.ceil(len(pivots) / 20))
+
+    if inverse and backend == "networkx":
+        weight = inverse_weight if weight == "weight" else functools.partial(inverse_weight, weight=weight)
+    pool = get_betweenness_pool(processes) if parallel and n >= PARALLEL_MIN_NODES and backend == "networkx" else None
+    if backend == "csr":
+        _, A = centrality.inverse_distances(G, weight=weight) if inverse else centrality.adjacency(G, weight=weight)
+        index = {node: i for i, node in enumerate(nodes)}
+
+    bt_c = dict.fromkeys(nodes, 0.0)
+    n_pivots = 0
+    previous_ranks = None
+    batch_seconds = 0
+    size = batch_size if time_budget is None else (pool.processes if pool is not None else 1)
+    while n_pivots < len(pivots):
+        batch = pivots[n_pivots : n_pivots + size]
+        batch_start = time.perf_counter()
+        if backend == "csr":
+            sources = np.array([index[s] for s in batch], dtype=np.int64)
+            bt = dict(zip(nodes, (0.5 * centrality.betweenness_arrays(A.indptr, A.indices, A.data, sources)).tolist()))
+        elif pool is not None:
+            bt = pool.betweenness_of_sources(G, batch, weight=weight)
+        else:
+            bt = nx.betweenness_centrality_subset(G, batch, nodes, normalized=False, weight=weight)
+        for v in bt:
+            bt_c[v] += bt[v]
+        n_pivots += len(batch)
+        batch_seconds += time.perf_counter() - batch_start
+
+        if time_budget is not None:
+            remaining = time_budget - (time.perf_counter() - start)
+            per_pivot = max(batch_seconds / n_pivots, 1e-9)
+            size = min(batch_size, int(remaining / 2 / per_pivot))
+            if size < 1:
+                break
+        if adaptive:
+            ranks = np.argsort(np.argsort([bt_c[v] for v in nodes]))
+            if previous_ranks is not None and np.corrcoef(ranks, previous_ranks)[0, 1] >= min_correlation:
+                break
+            previous_ranks = ranks
+
+    # Scale the sums over the sampled pivots up to all n sources
+    scale = n / n_pivots if n_pivots else 0
+    if normalized and n > 2:
+        directed = not isinstance(G, WordNetwork) and G.is_directed()
+        scale *= (1 if directed else 2) / ((n - 1) * (n - 2))
+    return {v: b * scale for v, b in bt_c.items()}
 
 
 def get_highest_weight_neighbors(G, person, n_neighbors=3):
@@ -119,8 +302,13 @@ def get_neighbors(highest_neighbors: pd.Series):
     return {k: v for k, v in sorted(neighbors.items(), key=lambda item: item[1], reverse=True)}
 
 
-def filter_person(df, pers1, pers2):
-    """Filters DataFrame for E-Mail Exchange between given addresses."""
+def filter_person(df, pers1, pers2, mail_index=None):
+    """
+    Filters DataFrame for E-Mail Exchange between given addresses.
+    With a mailindex.MailIndex of df, the mails are looked up in the index instead of scanning df.
+    """
+    if mail_index is not None:
+        return mail_index.between(pers1, pers2)
     result = df[(df["From"] == pers1) & (df["To"] == pers2)]
 
     return result
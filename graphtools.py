@@ -1,5 +1,7 @@
+import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
+import layout
 
 
 def getTopNeighbors(G, node, n_neighbors):
@@ -31,19 +33,36 @@ def plot_graph(G, person, fig_size):
 
     colors = color_nodes(G, person)
 
-    pos = nx.spring_layout(G)
+    pos = layout.cached_layout(G)
     nx.draw(G, pos=pos, node_color=colors, node_size=300.0)
 
 
-def color_nodes(G, ego_node):
-    """Returns a list of colors to plot **G**. Marks **person** and its neighbors in **G**."""
-    colors = ["lightblue" for i in range(len(G.nodes))]
-
-    for ind, node in enumerate(G.nodes):
-        if node in nx.ego_graph(G, ego_node).nodes:
-            colors[ind] = "lightgreen"
-        if node == ego_node:
-            colors[ind] = "lightcoral"
+def color_nodes(G, ego_node, radius=1, ego_color="lightcoral", neighbor_color="lightgreen", color="lightblue"):
+    """
+    Returns an array of colors to plot **G**, aligned with G.nodes. Marks **ego_node** and its neighbors within **radius** in **G**.
+    ego_node can also be a list, tuple or set of nodes (e.g. several persons), their neighborhoods are marked together.
+    A node of G is always taken as one node, even if it is a tuple (e.g. in nx.grid_2d_graph).
+    Raises nx.NodeNotFound for nodes that are not in G.
+    """
+    if ego_node in G:
+        ego_nodes = [ego_node]
+    elif isinstance(ego_node, (list, tuple, set, frozenset)):
+        ego_nodes = list(ego_node)
+    else:
+        ego_nodes = [ego_node]
+    missing = [node for node in ego_nodes if node not in G]
+    if missing:
+        raise nx.NodeNotFound("Nodes {} are not in G.".format(missing))
+
+    # Each neighborhood is searched once, like nx.ego_graph
+    neighbors = set()
+    for node in ego_nodes:
+        neighbors.update(nx.single_source_shortest_path_length(G, node, cutoff=radius))
+
+    index = {node: i for i, node in enumerate(G.nodes)}
+    colors = np.full(len(index), color, dtype=object)
+    colors[[index[node] for node in neighbors]] = neighbor_color
+    colors[[index[node] for node in ego_nodes]] = ego_color
     return colors
 
 
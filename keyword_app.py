@@ -14,6 +14,8 @@ import random
 
 import textgraph
 import textmetrics
+from tokenizer import StemCache
+from metricscache import MetricsCache
 
 
 # ------------------ settings --------------------
@@ -25,14 +27,23 @@ language = "de"
 # hier Wörter hinzufügen, die ignoriert werden sollen
 additional_stopwords = ["PLATZHALTER", "PLATZHALTER 2", "-"]
 
+
+@st.cache(allow_output_mutation=True)
+def get_stemmer(language):
+    # der Cache der Wortstämme wird einmal geladen und bleibt über alle Reruns im Speicher
+    if language == "en":
+        return StemCache(SnowballStemmer("english"), path="stemcache_english.json")
+    return StemCache(SnowballStemmer("german"), path="stemcache_german.json")
+
+
 if language == "en":
     nlp = en_core_web_sm.load()
-    stemmer = SnowballStemmer("english")
+    stemmer = get_stemmer(language)
 
 elif language == "de":
     # nlp = de_core_news_sm.load()
     nlp = de_core_news_sm.load()
-    stemmer = SnowballStemmer("german")
+    stemmer = get_stemmer(language)
 
 stopwords = nlp.Defaults.stop_words
 stopwords = stopwords.union(set(additional_stopwords))
@@ -48,16 +59,43 @@ def load_data(uploaded_file, col=0):
     return texts
 
 
+@st.cache(allow_output_mutation=True)
+def create_word_network(texts_tokenized):
+    network = textgraph.create_word_network(texts=texts_tokenized)
+    return network
+
+
 @st.cache(allow_output_mutation=True)
 def create_wcn(texts_tokenized, link_filter):
-    wcn = textgraph.create_wcn(texts=texts_tokenized, link_filter=link_filter)
+    # ein geänderter link_filter filtert nur das gecachte Netzwerk neu, ohne neu zu zählen
+    network = create_word_network(texts_tokenized=texts_tokenized)
+    wcn = textgraph.create_wcn_from_network(network=network, link_filter=link_filter)
     return wcn
 
 
-@st.cache
-def calculate_metrics(G, texts_tokenized, parallel, calc_connectivity):
-    mtrcs = textmetrics.calculateTextMetrics(G, texts_tokenized, parallel=parallel, calc_connectivity=calc_connectivity)
-    return mtrcs
+@st.cache(allow_output_mutation=True)
+def get_metrics_cache():
+    # Metriken werden nach dem Inhalt des Graphen gecacht, auch auf der Festplatte für spätere Sitzungen
+    return MetricsCache(path="metrics_cache")
+
+
+def extract_keywords(G, texts_tokenized, n_top, parallel, time_budget=None):
+    # nur die n_top häufigsten Wörter werden ausgewählt, ohne alle Metriken zu sortieren
+    # mit time_budget wird die Konnektivität aus zufällig gewählten Wörtern geschätzt, bis das Ranking stabil ist
+    # backend "csr" berechnet die kürzesten Wege auf Arrays (mit numba kompiliert, siehe requirements-optional.txt; ohne numba deutlich langsamer in reinem Python)
+    keywords = textmetrics.extractKeywords(
+        G,
+        texts_tokenized,
+        k=n_top,
+        rank_by=["prevalence"],
+        metrics=["prevalence", "diversity", "connectivity"],
+        parallel=parallel,
+        backend="csr",
+        time_budget=time_budget,
+        adaptive=time_budget is not None,
+        cache=get_metrics_cache(),
+    )
+    return keywords
 
 
 session_state_keys = ["is_file", "kw_extracted", "plot_settings", "is_extract"]
@@ -97,18 +135,20 @@ with st.container():
 
         # Die Texte werden bereinigt und in Tokens zerlegt
         texts_tokenized = textgraph.clean_texts(texts=texts, stopwords=stopwords, stemmer=stemmer)  # bei Bedarf Stemmer übergeben
+        if stemmer.unsaved:
+            stemmer.save()  # neue Wortstämme für den nächsten Lauf speichern
 
         link_filter = 2
         G = create_wcn(texts_tokenized=texts_tokenized, link_filter=link_filter)
 
-        # ------------------ calculate metrics  --------------------
-        metrics = calculate_metrics(G, texts_tokenized, parallel=True, calc_connectivity=False)
-
         # Anzahl der Top X Elemente, sortiert nach prevalence
         n_top = 20
 
-        result = metrics.iloc[:n_top, :].sort_values(by="diversity", ascending=False)
-        result.rename(columns={"prevalence": "relative Häufigkeit", "diversity": "Diversität"}, inplace=True)
+        # ------------------ calculate metrics  --------------------
+        keywords = extract_keywords(G, texts_tokenized, n_top=n_top, parallel=True, time_budget=10)
+
+        result = keywords.sort_values(by="diversity", ascending=False)
+        result.rename(columns={"prevalence": "relative Häufigkeit", "diversity": "Diversität", "connectivity": "Konnektivität"}, inplace=True)
         st.subheader("Folgende Schlüsselwörter wurden identifiziert")
         result  # magic
 
@@ -0,0 +1,240 @@
+import weakref
+import numpy as np
+from scipy import sparse
+from collections import OrderedDict
+import centrality
+from cooccurrence import graph_version
+from metricscache import graph_fingerprint
+
+
+def force_layout(
+    G,
+    pos=None,
+    k=None,
+    iterations=50,
+    threshold=1e-4,
+    weight="weight",
+    scale=1,
+    center=None,
+    temperature=0.1,
+    seed=None,
+    exact_max_nodes=1000,
+):
+    """
+    Positions the nodes of G with the Fruchterman-Reingold force-directed algorithm, vectorized with numpy.
+    Follows the dense algorithm of nx.spring_layout (networkx 2.6) step by step, from the same start positions for the same seed.
+    For more than **exact_max_nodes** nodes, the repulsion of distant nodes is approximated by the centres of grid cells
+    (like Barnes-Hut), so an iteration costs far less than n * n.
+    **pos** warm starts the layout from known positions, e.g. of a previous layout. A lower **temperature**
+    (the share of the layout size a node may move in the first iteration) keeps the layout closer to them.
+    Returns a dict of node -> position.
+    """
+    nodes = list(G)
+    n = len(nodes)
+    center = np.zeros(2) if center is None else np.asarray(center, dtype=np.float64)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: center}
+
+    rng = np.random.RandomState(seed)
+    if pos:
+        dom_size = max(coord for p in pos.values() for coord in p) or 1
+        positions = rng.rand(n, 2) * dom_size + center
+        for i, node in enumerate(nodes):
+            if node in pos:
+                positions[i] = pos[node]
+    else:
+        positions = rng.rand(n, 2)
+
+    if k is None:
+        k = np.sqrt(1.0 / n)
+
+    A = _weight_matrix(G, nodes, weight)
+    rows = np.repeat(np.arange(n), np.diff(A.indptr))
+    cols = A.indices
+    w = A.data
+
+    # Largest step of a node, cooled down linearly
+    t = max(np.ptp(positions[:, 0]), np.ptp(positions[:, 1])) * temperature
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        if n <= exact_max_nodes:
+            displacement = _exact_repulsion(positions, k)
+        else:
+            displacement = _grid_repulsion(positions, k)
+
+        # Attraction along the edges
+        delta = positions[rows] - positions[cols]
+        distance = np.maximum(np.linalg.norm(delta, axis=1), 0.01)
+        attraction = delta * (w * distance / k)[:, None]
+        displacement[:, 0] -= np.bincount(rows, weights=attraction[:, 0], minlength=n)
+        displacement[:, 1] -= np.bincount(rows, weights=attraction[:, 1], minlength=n)
+
+        length = np.linalg.norm(displacement, axis=1)
+        length = np.where(length < 0.01, 0.1, length)
+        delta_pos = displacement * (t / length)[:, None]
+        positions += delta_pos
+        t -= dt
+        if np.linalg.norm(delta_pos) / n < threshold:
+            break
+
+    # Rescale like nx.rescale_layout
+    positions -= positions.mean(axis=0)
+    lim = np.abs(positions).max()
+    if lim > 0:
+        positions *= scale / lim
+    positions += center
+    return dict(zip(nodes, positions))
+
+
+def _weight_matrix(G, nodes, weight):
+    """Returns the csr matrix of edge weights in the order of **nodes**, like nx.to_numpy_array (missing weights count as 1)."""
+    if not G.is_directed():
+        return centrality.adjacency(G, weight=weight)[1]
+
+    index = {node: i for i, node in enumerate(nodes)}
+    rows, cols, data = [], [], []
+    for u, v, d in G.edges.data(weight, default=1):
+        rows.append(index[u])
+        cols.append(index[v])
+        data.append(d)
+    return sparse.csr_matrix((np.array(data, dtype=np.float64), (rows, cols)), shape=(len(nodes), len(nodes)))
+
+
+def _exact_repulsion(positions, k, chunksize=1024):
+    """Sums the repulsion k^2 / distance of all pairs of nodes, in chunks of rows to bound the memory."""
+    x, y = positions[:, 0], positions[:, 1]
+    displacement = np.empty_like(positions)
+    for start in range(0, len(positions), chunksize):
+        rows = slice(start, start + chunksize)
+        displacement[rows] = _pair_forces(x[rows], y[rows], x, y, k)
+    return displacement
+
+
+def _pair_forces(x1, y1, x2, y2, k, mass=None):
+    """Returns the repulsion of the nodes (x2, y2) on each of the nodes (x1, y1), weighted by the **mass** of x2."""
+    dx = x1[:, None] - x2[None, :]
+    dy = y1[:, None] - y2[None, :]
+    # Minimum distance of 0.01
+    factor = k * k / np.maximum(dx * dx + dy * dy, 1e-4)
+    if mass is not None:
+        factor *= mass
+    return np.stack([(dx * factor).sum(axis=1), (dy * factor).sum(axis=1)], axis=1)
+
+
+def _grid_repulsion(positions, k, theta=0.7):
+    """
+    Approximates the repulsion of all pairs of nodes, like Barnes-Hut on a single level of about n^0.6 cells.
+    The nodes are split into g strips by x and each strip into g cells by y, so all cells hold about the same number of nodes.
+    A cell acts by its centre and number of nodes on nodes that are far away compared to its size (size / distance < theta),
+    on all other nodes by its single nodes.
+    """
+    n = len(positions)
+    x, y = positions[:, 0], positions[:, 1]
+    g = max(2, int(round(n ** 0.3)))
+
+    # Balanced cells, the nodes of a cell are contiguous in order
+    strip = np.empty(n, dtype=np.int64)
+    strip[np.argsort(x, kind="stable")] = np.arange(n) * g // n
+    order = np.lexsort((y, strip))
+    strip_sizes = np.bincount(strip, minlength=g)
+    strip_starts = np.concatenate([[0], np.cumsum(strip_sizes)])
+    sorted_strip = strip[order]
+    rank = np.arange(n) - strip_starts[sorted_strip]
+    sorted_cell = sorted_strip * g + rank * g // strip_sizes[sorted_strip]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_cell)) + 1])
+
+    xs, ys = x[order], y[order]
+    mass = np.diff(np.concatenate([starts, [n]])).astype(np.float64)
+    cx = np.add.reduceat(xs, starts) / mass
+    cy = np.add.reduceat(ys, starts) / mass
+    size = np.maximum(np.maximum.reduceat(xs, starts) - np.minimum.reduceat(xs, starts), np.maximum.reduceat(ys, starts) - np.minimum.reduceat(ys, starts))
+
+    # Far field: each node against the centres of the cells that are far enough away
+    dx = x[:, None] - cx[None, :]
+    dy = y[:, None] - cy[None, :]
+    d2 = dx * dx + dy * dy
+    far = size[None, :] ** 2 < theta * theta * d2
+    factor = np.where(far, mass[None, :] * k * k / np.maximum(d2, 1e-4), 0)
+    displacement = np.stack([(dx * factor).sum(axis=1), (dy * factor).sum(axis=1)], axis=1)
+
+    # Near field: the single nodes of each cell on the nodes close to it
+    ends = np.concatenate([starts[1:], [n]])
+    for c in range(len(starts)):
+        near = np.flatnonzero(~far[:, c])
+        members = slice(starts[c], ends[c])
+        displacement[near] += _pair_forces(x[near], y[near], xs[members], ys[members], k)
+    return displacement
+
+
+class LayoutCache:
+    """
+    Caches layouts in a bounded LRU cache, keyed by (graph fingerprint, node, radius, min_weight).
+    If only min_weight changed, the new layout is warm started from the latest layout of the same ego
+    and needs fewer iterations, so the plot keeps its shape.
+    """
+
+    def __init__(self, maxsize=64, warm_iterations=20, warm_temperature=0.02):
+        self.maxsize = maxsize
+        self.warm_iterations = warm_iterations
+        self.warm_temperature = warm_temperature
+        self._cache = OrderedDict()
+        self._latest = OrderedDict()
+
+    def layout(self, G, graph=None, node=None, radius=None, min_weight=None, seed=42, **kwargs):
+        """
+        Returns the positions of the nodes of **graph**, the part of G given by node, radius and min_weight
+        (e.g. the ego graph of node). Without graph, G itself is laid out. kwargs are passed to force_layout.
+        """
+        graph = G if graph is None else graph
+        fingerprint = _fingerprint(G)
+        key = (fingerprint, node, radius, min_weight)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        warm = self._latest.get((fingerprint, node, radius))
+        if warm is not None:
+            pos = force_layout(graph, pos=warm, iterations=self.warm_iterations, temperature=self.warm_temperature, seed=seed, **kwargs)
+        else:
+            pos = force_layout(graph, seed=seed, **kwargs)
+
+        self._remember(self._cache, key, pos)
+        self._remember(self._latest, (fingerprint, node, radius), pos)
+        return pos
+
+    def clear(self):
+        """Removes all cached layouts."""
+        self._cache.clear()
+        self._latest.clear()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if self.maxsize is not None and len(cache) > self.maxsize:
+            cache.popitem(last=False)
+
+
+# Fingerprints per graph, dropped together with the graph
+_fingerprints = weakref.WeakKeyDictionary()
+
+_default_cache = LayoutCache()
+
+
+def _fingerprint(G):
+    """
+    Returns the graph_fingerprint of G, calculated once per graph version. Checking the version is O(1),
+    only a new version (see cooccurrence.bump_version) reads the links of G again.
+    """
+    version = graph_version(G)
+    cached = _fingerprints.get(G)
+    if cached is None or cached[0] != version:
+        cached = (version, graph_fingerprint(G))
+        _fingerprints[G] = cached
+    return cached[1]
+
+
+def cached_layout(G, graph=None, node=None, radius=None, min_weight=None, **kwargs):
+    """Returns the layout of **graph** (or G) from the shared LayoutCache, see LayoutCache.layout."""
+    return _default_cache.layout(G, graph=graph, node=node, radius=radius, min_weight=min_weight, **kwargs)
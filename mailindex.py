@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+class MailIndex:
+    """
+    Index of the accounts of a mail DataFrame with the columns From and To.
+    Accounts are coded as integers once, and the row positions of each sender, each recipient and each (From, To) pair
+    are grouped once, so a lookup returns its rows in time proportional to the result instead of scanning all rows.
+    Rows are returned in the order of the DataFrame, like a boolean filter.
+    Building the index costs a few sorts of all rows, so it pays off for a DataFrame that is queried repeatedly
+    (keep it together with the DataFrame, e.g. in the cache of the app); a single lookup is cheaper as boolean filter.
+    The index is not updated when df is changed.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.accounts = pd.Index(pd.unique(np.concatenate([df["From"].to_numpy(), df["To"].to_numpy()])))
+        n = len(self.accounts)
+        self.from_codes = self.accounts.get_indexer(df["From"]).astype(np.int64)
+        self.to_codes = self.accounts.get_indexer(df["To"]).astype(np.int64)
+
+        self._from_order, self._from_starts = _group(self.from_codes, n)
+        self._to_order, self._to_starts = _group(self.to_codes, n)
+
+        # Pairs are coded as From * n + To, only the pairs that occur are kept
+        pairs = self.from_codes * n + self.to_codes
+        self._pair_order = np.argsort(pairs, kind="stable")
+        self._pair_keys, self._pair_starts = np.unique(pairs[self._pair_order], return_index=True)
+        self._pair_starts = np.append(self._pair_starts, len(pairs))
+
+    def code(self, account):
+        """Returns the integer code of **account**, -1 if it has no mails."""
+        try:
+            return self.accounts.get_loc(account)
+        except KeyError:
+            return -1
+
+    def sent_positions(self, account):
+        """Row positions of the mails from **account**."""
+        return self._slice(self._from_order, self._from_starts, self.code(account))
+
+    def received_positions(self, account):
+        """Row positions of the mails to **account**."""
+        return self._slice(self._to_order, self._to_starts, self.code(account))
+
+    def account_positions(self, account):
+        """Row positions of the mails from or to **account**."""
+        return np.union1d(self.sent_positions(account), self.received_positions(account))
+
+    def pair_positions(self, sender, recipient):
+        """Row positions of the mails from **sender** to **recipient**."""
+        i = self._pair(sender, recipient)
+        if i < 0:
+            return np.empty(0, dtype=np.int64)
+        return self._pair_order[self._pair_starts[i] : self._pair_starts[i + 1]]
+
+    def sent(self, account):
+        """Mails from **account**."""
+        return self.df.iloc[self.sent_positions(account)]
+
+    def received(self, account):
+        """Mails to **account**."""
+        return self.df.iloc[self.received_positions(account)]
+
+    def of_account(self, account):
+        """Mails from or to **account**."""
+        return self.df.iloc[self.account_positions(account)]
+
+    def between(self, sender, recipient):
+        """Mails from **sender** to **recipient**."""
+        return self.df.iloc[self.pair_positions(sender, recipient)]
+
+    def _pair(self, sender, recipient):
+        sender, recipient = self.code(sender), self.code(recipient)
+        if sender < 0 or recipient < 0:
+            return -1
+        key = sender * len(self.accounts) + recipient
+        i = int(np.searchsorted(self._pair_keys, key))
+        if i == len(self._pair_keys) or self._pair_keys[i] != key:
+            return -1
+        return i
+
+    @staticmethod
+    def _slice(order, starts, code):
+        if code < 0:
+            return np.empty(0, dtype=np.int64)
+        return order[starts[code] : starts[code + 1]]
+
+
+def _group(codes, n):
+    """Returns the row positions sorted by code (rows keep their order within a code) and the start of each code."""
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(n + 1))
+    return order, starts
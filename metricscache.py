@@ -0,0 +1,138 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+from scipy import sparse
+from collections import OrderedDict
+import centrality
+from cooccurrence import WordNetwork
+
+
+def graph_fingerprint(G, texts=None, **params):
+    """
+    Returns a content hash of the word network G, the tokenized **texts** (if given) and the parameters of a calculation.
+    Nodes and their prevalence are hashed in the order of G, links as sorted arrays of node positions and weights,
+    so the fingerprint does not depend on the order in which the links were added.
+    G can be a networkx Graph or a cooccurrence.WordNetwork.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(type(G).__name__.encode())
+
+    nodes, A = centrality.adjacency(G)
+    h.update("\n".join(map(repr, nodes)).encode())
+
+    # Upper triangle in canonical csr form: duplicates summed, indices sorted
+    A = sparse.triu(A).tocsr()
+    A.sum_duplicates()
+    A.sort_indices()
+    for array in (A.indptr.astype(np.int64), A.indices.astype(np.int64), A.data.astype(np.float64)):
+        h.update(array.tobytes())
+
+    if isinstance(G, WordNetwork):
+        prevalence = np.asarray(G.prevalence, dtype=np.float64)
+    else:
+        prevalence = np.array([p for _, p in G.nodes(data="prevalence", default=np.nan)], dtype=np.float64)
+    h.update(prevalence.tobytes())
+
+    if texts is not None:
+        for t in texts:
+            h.update(repr(t).encode())
+            h.update(b"\n")
+
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+class MetricsCache:
+    """
+    Caches metric results in a bounded LRU cache, keyed by graph_fingerprint.
+    If **path** is given, results are also stored as pickle files in this directory and found again
+    by later app sessions and CLI runs, at most **disk_maxsize** files: the least recently used are removed.
+    Cached results are returned as they are and should not be modified.
+    """
+
+    def __init__(self, maxsize=32, path=None, disk_maxsize=256):
+        self.maxsize = maxsize
+        self.path = path
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def get(self, key, default=None):
+        """Returns the result for **key** from memory or disk, default if it is not cached."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        file = self._file(key)
+        if file and os.path.exists(file):
+            with open(file, "rb") as f:
+                value = pickle.load(f)
+            # The modification time marks the last use, see _prune
+            os.utime(file)
+            self._remember(key, value)
+            return value
+        return default
+
+    def put(self, key, value):
+        """Caches **value** for **key**, in memory and on disk."""
+        self._remember(key, value)
+
+        file = self._file(key)
+        if file:
+            with open(file, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._prune()
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached result for **key**, calls compute() and caches its result if there is none."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def cache_info(self):
+        """Returns hits, misses, maxsize and current size of the cache in memory."""
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._cache)}
+
+    def clear(self):
+        """Removes all cached results, also from disk, and resets the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        for file in self._files():
+            os.remove(file)
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".pkl") if self.path else None
+
+    def _files(self):
+        if not self.path:
+            return []
+        return [os.path.join(self.path, file) for file in os.listdir(self.path) if file.endswith(".pkl")]
+
+    def _prune(self):
+        """Removes the least recently used files beyond disk_maxsize."""
+        if self.disk_maxsize is None:
+            return
+        files = self._files()
+        if len(files) > self.disk_maxsize:
+            files.sort(key=os.path.getmtime)
+            for file in files[: len(files) - self.disk_maxsize]:
+                os.remove(file)
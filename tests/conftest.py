@@ -0,0 +1,35 @@
+import os
+import sys
+import networkx as nx
+import pytest
+
+# The modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class EdgeCountingGraph(nx.Graph):
+    """A Graph that counts how often its links are read through edges, adj or adjacency()."""
+
+    edge_reads = 0
+
+    @property
+    def edges(self):
+        self.edge_reads += 1
+        return super().edges
+
+    @property
+    def adj(self):
+        self.edge_reads += 1
+        return super().adj
+
+    def adjacency(self):
+        self.edge_reads += 1
+        return super().adjacency()
+
+
+@pytest.fixture
+def edge_counting_graph():
+    """A weighted cycle of 8 nodes that counts the reads of its links."""
+    G = EdgeCountingGraph()
+    G.add_weighted_edges_from((i, (i + 1) % 8, 1) for i in range(8))
+    return G
@@ -0,0 +1,91 @@
+import random
+import pytest
+import networkx as nx
+import centrality
+import graphmetrics
+import textmetrics
+from cooccurrence import CooccurrenceCounter, IncrementalWordNetwork
+
+
+def random_graph(seed, n=60, p=0.08, loops=5, weights=(1, 2, 3, 5)):
+    """Random graph with some self loops, the **weights** are exact floats, so equal path lengths tie exactly."""
+    rng = random.Random(seed)
+    G = nx.gnp_random_graph(n, p, seed=seed)
+    G.add_edges_from((v, v) for v in rng.sample(range(n), loops))
+    for u, v in G.edges:
+        G[u][v]["weight"] = rng.choice(weights)
+    return G
+
+
+def assert_same(expected, actual):
+    assert actual.keys() == expected.keys()
+    for node, value in expected.items():
+        assert actual[node] == pytest.approx(value, rel=1e-9, abs=1e-12), node
+
+
+@pytest.fixture
+def python_kernel(monkeypatch):
+    """Runs betweenness_arrays on python lists, also if numba is installed."""
+    monkeypatch.setattr(centrality, "numba", None)
+    monkeypatch.setattr(centrality, "_brandes", getattr(centrality._brandes, "py_func", centrality._brandes))
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("normalized", [True, False])
+def test_python_kernel_matches_networkx(python_kernel, seed, normalized):
+    G = random_graph(seed)
+
+    expected = nx.betweenness_centrality(G, weight="weight", normalized=normalized)
+    assert_same(expected, centrality.betweenness_centrality(G, weight="weight", normalized=normalized))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_python_kernel_matches_networkx_with_inverse_weights(python_kernel, seed):
+    # Distances 1, 1 / 2 and 1 / 4, a weight of 0 is a distance of 1
+    G = random_graph(seed, weights=(0, 1, 2, 4))
+
+    expected = nx.betweenness_centrality(G, weight=graphmetrics.inverse_weight)
+    assert_same(expected, centrality.betweenness_centrality(G, weight="weight", inverse=True))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_python_kernel_matches_networkx_subset(python_kernel, seed):
+    G = random_graph(seed)
+    sources = random.Random(seed).sample(list(G), 10)
+
+    expected = nx.betweenness_centrality_subset(G, sources, list(G), normalized=False, weight="weight")
+    actual = centrality.betweenness_centrality(G, weight="weight", normalized=False, sources=sources)
+    assert_same(expected, actual)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_numba_kernel_matches_networkx(seed):
+    pytest.importorskip("numba")
+    assert centrality.numba is not None
+    G = random_graph(seed)
+
+    expected = nx.betweenness_centrality(G, weight="weight")
+    assert_same(expected, centrality.betweenness_centrality(G, weight="weight"))
+
+
+def test_inverse_distances_follow_reweighted_links():
+    network = IncrementalWordNetwork(co_range=1, link_filter=1)
+    network.add_documents([["gas", "strom", "preis", "gas", "markt"], ["markt", "preis"]])
+    G = network.get_wcn()
+    centrality.betweenness_centrality(G, inverse=True)
+
+    # Same words and links, only their weights change
+    network.add_documents([["gas", "strom"], ["gas", "strom"]])
+    assert network.get_wcn() is G
+    assert centrality.betweenness_centrality(G, inverse=True) == centrality.betweenness_centrality(G.copy(), inverse=True)
+
+
+def test_csr_connectivity_of_word_network_matches_its_graph():
+    rng = random.Random(0)
+    counter = CooccurrenceCounter(co_range=2)
+    counter.add_documents([[f"w{rng.randint(0, 40)}" for _ in range(15)] for _ in range(40)])
+    network = counter.to_network().filter(link_filter=2)
+
+    expected = textmetrics.calculateConnectivity(network.to_graph(), backend="csr")
+    assert_same(expected, textmetrics.calculateConnectivity(network, backend="csr"))
+    assert_same(expected, textmetrics.calculateConnectivity(network, backend="csr", k=10 ** 6))
@@ -0,0 +1,163 @@
+import random
+import networkx as nx
+import pytest
+from cooccurrence import CooccurrenceCounter, IncrementalWordNetwork
+from textgraph import create_wcn, create_word_network
+
+
+def legacy_cooccurrences(texts, co_range):
+    """The co-occurrence loop of the original textgraph.create_wcn, returns the unfiltered Graph."""
+    G = nx.Graph()
+    for doc in texts:
+        w_list = []
+        length = len(doc)
+
+        if co_range == 0:
+            co_range = length
+
+        for k, w in enumerate(doc):
+            if (k + co_range) >= length:
+                superior = length
+            else:
+                superior = k + co_range + 1
+            if k < length - 1:
+                for i in range(k + 1, superior):
+                    linked_word = doc[i].split()
+                    w_list = w_list + linked_word
+            if w_list:
+                for p in w_list:
+                    if G.has_edge(w, p):
+                        G[w][p]["weight"] += 1
+                    else:
+                        G.add_edge(w, p, weight=1)
+            w_list = []
+    return G
+
+
+def weighted_edges(G, link_filter=1):
+    return sorted((*sorted((u, v)), w) for u, v, w in G.edges(data="weight") if w >= link_filter)
+
+
+def random_texts(rng, n_texts=30, vocabulary=25):
+    # Small vocabulary, so words repeat within a text and self-links occur
+    return [[f"w{rng.randrange(vocabulary)}" for _ in range(rng.randint(0, 30))] for _ in range(n_texts)]
+
+
+def test_sentence_window_links_words_of_each_sentence():
+    counter = CooccurrenceCounter(co_range="sentence")
+    counter.add_document([["gas", "strom"], ("gas", "preis")])
+
+    G = counter.to_graph()
+    assert sorted(G.edges(data="weight")) == [("gas", "preis", 1), ("gas", "strom", 1)]
+
+
+@pytest.mark.parametrize("counter", [CooccurrenceCounter(co_range="sentence"), IncrementalWordNetwork(co_range="sentence")])
+def test_sentence_window_rejects_flat_token_lists(counter):
+    with pytest.raises(ValueError):
+        counter.add_document(["gas", "strom"])
+    assert counter.n_documents == 0
+    assert len(counter.vocabulary) == 0
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("co_range", [1, 2, 5, 40])
+@pytest.mark.parametrize("link_filter", [1, 2, 3])
+def test_window_weights_match_legacy_loop(seed, co_range, link_filter):
+    texts = random_texts(random.Random(seed))
+
+    G = create_wcn(texts, co_range=co_range, link_filter=link_filter)
+    assert weighted_edges(G) == weighted_edges(legacy_cooccurrences(texts, co_range), link_filter)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("co_range", [0, "document"])
+def test_document_window_uses_the_length_of_each_document(seed, co_range):
+    texts = random_texts(random.Random(seed))
+    # A short first document made the original loop use its length as window for all documents
+    texts.insert(0, ["w1", "w2"])
+
+    expected = nx.Graph()
+    for doc in texts:
+        for u, v, w in legacy_cooccurrences([doc], 0).edges(data="weight"):
+            expected.add_edge(u, v, weight=expected[u][v]["weight"] + w if expected.has_edge(u, v) else w)
+
+    G = create_wcn(texts, co_range=co_range, link_filter=1)
+    assert weighted_edges(G) == weighted_edges(expected)
+    assert weighted_edges(G) != weighted_edges(legacy_cooccurrences(texts, 0))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_word_network_matches_legacy_graph(seed):
+    texts = random_texts(random.Random(seed))
+    counter = CooccurrenceCounter(co_range=3)
+    counter.add_documents(texts)
+    network = counter.to_network()
+
+    G = network.to_graph()
+    legacy = legacy_cooccurrences(texts, 3)
+    assert weighted_edges(G) == weighted_edges(legacy)
+    assert network.number_of_edges() == G.number_of_edges() == legacy.number_of_edges()
+    assert network.number_of_nodes() == G.number_of_nodes() == len({w for t in texts for w in t})
+    assert nx.number_of_selfloops(G) > 0
+
+
+def test_word_network_counts_self_links_once():
+    counter = CooccurrenceCounter(co_range=0)
+    counter.add_document(["gas", "gas", "strom"])
+    network = counter.to_network()
+
+    assert network.number_of_edges() == 2
+    assert network.weights[0, 0] == 1
+    assert network.weights[0, 1] == network.weights[1, 0] == 2
+
+
+def test_to_graph_orders_nodes_by_decreasing_count():
+    counter = CooccurrenceCounter(co_range=1)
+    counter.add_documents([["markt", "gas", "strom", "gas"], ["strom", "gas"]])
+    G = counter.to_graph()
+
+    assert list(G) == ["gas", "strom", "markt"]
+    prevalence = dict(G.nodes(data="prevalence"))
+    assert prevalence["gas"] > prevalence["strom"] > prevalence["markt"]
+
+
+def assert_same_graph(G, expected):
+    assert set(G) == set(expected)
+    assert weighted_edges(G) == weighted_edges(expected)
+    for word, prevalence in expected.nodes(data="prevalence"):
+        assert G.nodes[word]["prevalence"] == pytest.approx(prevalence)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("co_range", [2, "document"])
+def test_incremental_network_matches_rebuild(seed, co_range):
+    rng = random.Random(seed)
+    texts = random_texts(rng, n_texts=40)
+    network = IncrementalWordNetwork(co_range=co_range, link_filter=2)
+    ids = network.add_documents(texts)
+
+    removed = set(rng.sample(ids, 15))
+    network.remove_documents(removed)
+    kept = [t for i, t in zip(ids, texts) if i not in removed]
+    assert_same_graph(network.get_wcn(), create_wcn(kept, co_range=co_range, link_filter=2))
+
+    network.set_link_filter(3)
+    assert_same_graph(network.get_wcn(), create_wcn(kept, co_range=co_range, link_filter=3))
+
+    more = random_texts(rng, n_texts=5)
+    network.add_documents(more)
+    assert_same_graph(network.get_wcn(), create_wcn(kept + more, co_range=co_range, link_filter=3))
+    expected = create_word_network(kept + more, co_range=co_range)
+    assert weighted_edges(network.to_network().to_graph()) == weighted_edges(expected.to_graph())
+
+
+@pytest.mark.parametrize("ids", [[0, 5], [0, 0]])
+def test_remove_documents_checks_all_ids_first(ids):
+    network = IncrementalWordNetwork(co_range=1, link_filter=1)
+    network.add_documents([["gas", "strom"], ["gas", "preis"]])
+    before = weighted_edges(network.get_wcn())
+
+    with pytest.raises(KeyError):
+        network.remove_documents(ids)
+    assert weighted_edges(network.get_wcn()) == before
+    assert network.n_documents == 2
@@ -0,0 +1,66 @@
+import os
+import random
+import pandas as pd
+import pytest
+import networkx as nx
+import centrality
+from cooccurrence import CooccurrenceCounter
+
+dc = pytest.importorskip("distinctiveness.dc")
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cleaned_reduced.csv")
+
+MEASURES = ["D1", "D2", "D3", "D4", "D5"]
+
+
+def random_graph(seed, n=40, p=0.15, loops=5):
+    rng = random.Random(seed)
+    G = nx.gnp_random_graph(n, p, seed=seed)
+    G.add_edges_from((v, v) for v in rng.sample(range(n), loops))
+    for u, v in G.edges:
+        G[u][v]["weight"] = rng.randint(1, 10)
+    return G
+
+
+def assert_same(expected, actual):
+    for measure in expected:
+        assert actual[measure].keys() == expected[measure].keys()
+        for node, value in expected[measure].items():
+            assert actual[measure][node] == pytest.approx(value, rel=1e-9, abs=1e-12), (measure, node)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("alpha", [1, 2, [1, 2, 0.5, 1.5, 3]])
+@pytest.mark.parametrize("normalize", [False, True])
+def test_matches_distinctiveness_package(seed, alpha, normalize):
+    G = random_graph(seed)
+
+    expected = dc.distinctiveness(G, alpha=alpha, normalize=normalize, measures=MEASURES)
+    actual = centrality.distinctiveness_centrality(G, alpha=alpha, normalize=normalize, measures=MEASURES)
+    assert_same(expected, actual)
+
+
+def test_word_network_matches_its_graph():
+    rng = random.Random(0)
+    counter = CooccurrenceCounter(co_range=3)
+    counter.add_documents([[f"w{rng.randint(0, 30)}" for _ in range(20)] for _ in range(30)])
+    network = counter.to_network()
+
+    expected = dc.distinctiveness(network.to_graph(), measures=MEASURES)
+    actual = centrality.distinctiveness_centrality(network, measures=MEASURES)
+    assert_same(expected, actual)
+
+
+def test_mail_graph_from_bundled_data():
+    df = pd.read_csv(DATA, index_col=0)
+    G = nx.Graph()
+    for (sender, recipient), n_mails in df.groupby(["From", "To"]).size().items():
+        if G.has_edge(sender, recipient):
+            G[sender][recipient]["weight"] += n_mails
+        else:
+            G.add_edge(sender, recipient, weight=n_mails)
+
+    for alpha in [1, 2]:
+        expected = dc.distinctiveness(G, alpha=alpha, normalize=True, measures=MEASURES)
+        actual = centrality.distinctiveness_centrality(G, alpha=alpha, normalize=True, measures=MEASURES)
+        assert_same(expected, actual)
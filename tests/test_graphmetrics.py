@@ -0,0 +1,86 @@
+import gc
+import types
+import networkx as nx
+import pytest
+import graphmetrics
+from cooccurrence import IncrementalWordNetwork, bump_version, graph_version
+
+
+@pytest.fixture
+def pool():
+    pool = graphmetrics.BetweennessPool(processes=2)
+    yield pool
+    pool.close()
+
+
+def test_pool_sees_new_graph_versions(pool):
+    G = nx.cycle_graph(6)
+    nx.set_edge_attributes(G, 1, "weight")
+    assert set(pool.betweenness_centrality(G, weight="weight", normalized=False).values()) == {2.0}
+    workers = pool._pool
+    pool.betweenness_centrality(G, weight="weight")
+    assert pool._pool is workers
+
+    G[2][3]["weight"] = 100
+    bump_version(G)
+    assert pool.betweenness_centrality(G, weight="weight", normalized=False) == nx.betweenness_centrality(G, weight="weight", normalized=False)
+
+
+def test_pool_does_not_keep_its_graph_alive(pool):
+    G = nx.path_graph(5)
+    pool.betweenness_centrality(G, weight=None)
+    graph = pool._graph
+
+    del G
+    gc.collect()
+    assert graph() is None
+
+
+def test_incremental_graph_counts_its_versions():
+    network = IncrementalWordNetwork(co_range=1, link_filter=1)
+    G = network.graph
+    versions = [graph_version(G)]
+
+    ids = network.add_documents([["gas", "strom", "preis", "gas"], ["gas", "strom"]])
+    versions.append(graph_version(network.get_wcn()))
+    network.remove_documents(ids[1:])
+    versions.append(graph_version(network.get_wcn()))
+
+    assert network.get_wcn() is G
+    assert len(set(versions)) == 3
+
+
+class FakeClock:
+    """Time that only passes while pivots are processed, 10 ms per pivot."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.pivots = 0
+
+    def __call__(self):
+        return self.now
+
+    def charge(self, f):
+        def wrapped(*args, **kwargs):
+            sources = args[3] if f.__name__ == "betweenness_arrays" else args[1]
+            self.now += 0.01 * len(sources)
+            self.pivots += len(sources)
+            return f(*args, **kwargs)
+
+        return wrapped
+
+
+@pytest.mark.parametrize("backend", ["csr", "networkx"])
+def test_time_budget_stops_before_it_is_used_up(monkeypatch, backend):
+    G = nx.gnm_random_graph(300, 1000, seed=1)
+    nx.set_edge_attributes(G, 1, "weight")
+    clock = FakeClock()
+    monkeypatch.setattr(graphmetrics, "time", types.SimpleNamespace(perf_counter=clock))
+    monkeypatch.setattr(graphmetrics.centrality, "betweenness_arrays", clock.charge(graphmetrics.centrality.betweenness_arrays))
+    monkeypatch.setattr(graphmetrics.nx, "betweenness_centrality_subset", clock.charge(nx.betweenness_centrality_subset))
+
+    bt = graphmetrics.approximate_betweenness_centrality(G, "weight", time_budget=1, backend=backend, seed=0)
+    # Batches are sized from the time per pivot, so almost all of the budget is used, but not more
+    assert clock.now <= 1
+    assert 90 <= clock.pivots <= 100
+    assert any(bt.values())
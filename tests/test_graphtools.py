@@ -0,0 +1,29 @@
+import networkx as nx
+import pytest
+import graphtools
+
+
+def test_color_nodes_marks_ego_and_neighbors():
+    G = nx.path_graph(["a", "b", "c", "d"])
+
+    assert list(graphtools.color_nodes(G, "b", ego_color="e", neighbor_color="n", color="o")) == ["n", "e", "n", "o"]
+    assert list(graphtools.color_nodes(G, ("a", "d"), ego_color="e", neighbor_color="n", color="o")) == ["e", "n", "n", "e"]
+
+
+def test_color_nodes_rejects_missing_node():
+    # Not split into the nodes "a" and "b"
+    G = nx.path_graph(["a", "b", "c"])
+
+    with pytest.raises(nx.NodeNotFound):
+        graphtools.color_nodes(G, "ab")
+
+
+def test_color_nodes_keeps_tuple_nodes_whole():
+    G = nx.grid_2d_graph(3, 3)
+
+    colors = dict(zip(G, graphtools.color_nodes(G, (1, 1), ego_color="e", neighbor_color="n", color="o")))
+    assert colors[(1, 1)] == "e"
+    assert [node for node, c in colors.items() if c == "n"] == [(0, 1), (1, 0), (1, 2), (2, 1)]
+    assert list(colors.values()).count("o") == 4
+    # Several tuple nodes still work as a list
+    assert list(graphtools.color_nodes(G, [(0, 0), (2, 2)], ego_color="e")).count("e") == 2
@@ -0,0 +1,28 @@
+import networkx as nx
+import layout
+from cooccurrence import bump_version
+
+
+def test_layout_cache_follows_new_graph_versions():
+    G = nx.cycle_graph(8)
+    nx.set_edge_attributes(G, 1, "weight")
+    cache = layout.LayoutCache()
+    before = cache.layout(G)
+    assert cache.layout(G) is before
+
+    G[0][1]["weight"] = 50
+    bump_version(G)
+    after = cache.layout(G)
+    assert after is not before
+    assert after.keys() == before.keys()
+
+
+def test_cached_layout_reads_links_only_once(edge_counting_graph):
+    G = edge_counting_graph
+    cache = layout.LayoutCache()
+    before = cache.layout(G)
+    reads = G.edge_reads
+
+    for _ in range(3):
+        assert cache.layout(G) is before
+    assert G.edge_reads == reads
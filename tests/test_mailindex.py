@@ -0,0 +1,98 @@
+import os
+import matplotlib
+import pandas as pd
+import pytest
+import accountanalysis
+import graphmetrics
+from mailindex import MailIndex
+
+matplotlib.use("Agg")
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cleaned_reduced.csv")
+
+
+@pytest.fixture(scope="module")
+def df():
+    return pd.read_csv(DATA, index_col=0, parse_dates=["Date"])
+
+
+@pytest.fixture(scope="module")
+def accounts(df):
+    return df["From"].value_counts().index[:5].tolist() + df["To"].value_counts().index[:5].tolist() + ["nobody@enron.com"]
+
+
+def test_lookups_match_boolean_filters(df, accounts):
+    mail_index = MailIndex(df)
+    for account in accounts:
+        pd.testing.assert_frame_equal(mail_index.sent(account), df[df["From"] == account])
+        pd.testing.assert_frame_equal(mail_index.received(account), df[df["To"] == account])
+        df_poi = accountanalysis.filter_df_for_poi(df, account)
+        pd.testing.assert_frame_equal(mail_index.of_account(account), df_poi)
+        pd.testing.assert_frame_equal(accountanalysis.filter_df_for_poi(df, account, mail_index=mail_index), df_poi)
+        for other in accounts:
+            between = graphmetrics.filter_person(df, account, other)
+            pd.testing.assert_frame_equal(mail_index.between(account, other), between)
+            pd.testing.assert_frame_equal(graphmetrics.filter_person(df, account, other, mail_index=mail_index), between)
+
+
+def test_contacts_with_count(df, accounts):
+    poi = accounts[0]
+    df_poi = accountanalysis.filter_df_for_poi(df, poi)
+    contacts = accountanalysis.get_contacts_of_poi(df_poi, poi)
+
+    counts = accountanalysis.get_contacts_with_count(df_poi, poi, contacts).set_index("contact")
+    sent = df_poi.loc[df_poi["From"] == poi, "To"].value_counts()
+    recieved = df_poi.loc[df_poi["To"] == poi, "From"].value_counts()
+    for contact in contacts:
+        assert counts.loc[contact, "sent"] == sent.get(contact, 0)
+        assert counts.loc[contact, "recieved"] == recieved.get(contact, 0)
+
+    # With an index of df_poi from the caller, and for contacts without mails
+    indexed = accountanalysis.get_contacts_with_count(df_poi, poi, list(contacts) + ["nobody@enron.com"], mail_index=MailIndex(df_poi))
+    pd.testing.assert_frame_equal(indexed.iloc[:-1], counts.reset_index())
+    assert indexed.iloc[-1].tolist() == ["nobody@enron.com", 0, 0]
+
+
+def test_account_information_with_index(df, accounts, capsys):
+    mail_index = MailIndex(df)
+    for account in accounts[:-1]:
+        accountanalysis.show_account_information(df, account)
+        scanned = capsys.readouterr().out
+        accountanalysis.show_account_information(df, account, mail_index=mail_index)
+        assert capsys.readouterr().out == scanned
+
+
+def count_per_day(df_raw, timeline):
+    # Stands in for get_cumulated_elements_per_day: the looked up mails, one value per day
+    return [len(df_raw)] * len(timeline)
+
+
+def test_contact_time_series_with_index(df, accounts, monkeypatch):
+    monkeypatch.setattr(accountanalysis, "get_cumulated_elements_per_day", count_per_day)
+    poi = accounts[0]
+    df_poi = accountanalysis.filter_df_for_poi(df, poi)
+    timeline = accountanalysis.create_timeline(df_poi, "Date")
+    mail_index = MailIndex(df_poi)
+
+    for contact in list(accountanalysis.get_contacts_of_poi(df_poi, poi))[:5]:
+        scanned = accountanalysis.get_cumulated_contact_time_series(df_poi, poi, contact, timeline)
+        indexed = accountanalysis.get_cumulated_contact_time_series(df_poi, poi, contact, timeline, mail_index=mail_index)
+        pd.testing.assert_frame_equal(indexed, scanned)
+
+
+def test_plot_communication_with_contacts_looks_up_each_contact_once(df, accounts, monkeypatch):
+    poi = accounts[0]
+    df_poi = accountanalysis.filter_df_for_poi(df, poi)
+    contacts = accountanalysis.get_contacts_with_count(df_poi, poi, accountanalysis.get_contacts_of_poi(df_poi, poi))
+    timeline = accountanalysis.create_timeline(df_poi, "Date")
+
+    monkeypatch.setattr(accountanalysis, "get_cumulated_elements_per_day", count_per_day)
+    lookups = []
+    between = MailIndex.between
+    monkeypatch.setattr(MailIndex, "between", lambda self, sender, recipient: lookups.append(recipient) or between(self, sender, recipient))
+    fig = accountanalysis.plot_communication_with_contacts(df_poi, poi, contacts, n_contacts=3, timeline=timeline, sent=True)
+
+    top = contacts.sort_values("sent", ascending=False)["contact"][:3].tolist()
+    assert lookups == top
+    assert [line.get_label() for line in fig.axes[0].get_lines()] == top
+    assert [line.get_ydata()[0] for line in fig.axes[0].get_lines()] == contacts.set_index("contact")["sent"][top].tolist()
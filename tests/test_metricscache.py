@@ -0,0 +1,25 @@
+import os
+from metricscache import MetricsCache
+
+
+def test_disk_cache_keeps_the_most_recently_used_files(tmp_path):
+    cache = MetricsCache(maxsize=1, path=str(tmp_path), disk_maxsize=3)
+    for i, key in enumerate("abc"):
+        cache.put(key, i)
+        os.utime(tmp_path / f"{key}.pkl", (i, i))
+
+    # Reading "a" from disk marks it as used
+    cache.get("a")
+    cache.put("d", 3)
+
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl", "c.pkl", "d.pkl"]
+    assert MetricsCache(path=str(tmp_path)).get("b") is None
+
+
+def test_clear_removes_the_files(tmp_path):
+    cache = MetricsCache(path=str(tmp_path))
+    cache.put("a", 1)
+    cache.clear()
+
+    assert os.listdir(tmp_path) == []
+    assert cache.get("a") is None
@@ -0,0 +1,97 @@
+import networkx as nx
+import pandas as pd
+import pytest
+import textgraph
+from cooccurrence import CooccurrenceCounter, IncrementalWordNetwork, bump_version
+
+
+def test_ego_index_follows_reweighted_links():
+    network = IncrementalWordNetwork(co_range=1, link_filter=1)
+    network.add_documents([["gas", "strom"], ["gas", "preis"], ["gas", "preis"]])
+    G = network.get_wcn()
+    assert textgraph.get_ego_index(G).neighbors("gas")[0] == ["preis", "strom"]
+
+    # Same words and links, only their weights change
+    network.add_documents([["gas", "strom"]] * 3)
+    assert textgraph.get_ego_index(G).neighbors("gas")[0] == ["strom", "preis"]
+
+
+def test_ego_index_follows_new_graph_versions():
+    G = nx.star_graph(3)
+    nx.set_edge_attributes(G, 1, "weight")
+    assert textgraph.get_ego_index(G).ego(0, min_weight=2).number_of_nodes() == 1
+
+    G[0][2]["weight"] = 5
+    bump_version(G)
+    assert list(textgraph.get_ego_index(G).ego(0, min_weight=2).edges) == [(0, 2)]
+
+
+def test_iter_texts_from_csv_drops_missing_and_duplicate_texts(tmp_path):
+    path = tmp_path / "texts.csv"
+    pd.DataFrame({"id": range(6), "text": ["gas", "strom", None, "gas", "preis", "strom"]}).to_csv(path, index=False)
+
+    assert list(textgraph.iter_texts_from_csv(str(path), "text", chunksize=2)) == ["gas", "strom", "preis"]
+    assert list(textgraph.iter_texts_from_csv(str(path), "text", chunksize=4, drop_duplicates=False)) == ["gas", "strom", "gas", "preis", "strom"]
+
+
+def test_streamed_texts_give_the_same_network():
+    texts = ["Der Gaspreis steigt. Der Strompreis auch!", "Gaspreis und Strompreis, Markt und Preis.", "Markt ohne Gaspreis."]
+    stopwords = ["der", "und", "auch", "ohne"]
+
+    assert list(textgraph.iter_clean_texts(iter(texts), stopwords)) == textgraph.clean_texts(texts, stopwords)
+    assert list(textgraph.iter_clean_texts(texts, stopwords, sentences=True)) == textgraph.clean_texts(texts, stopwords, sentences=True)
+
+    streamed = textgraph.create_wcn(textgraph.iter_clean_texts(iter(texts), stopwords), link_filter=1)
+    expected = textgraph.create_wcn(textgraph.clean_texts(texts, stopwords), link_filter=1)
+    assert sorted(streamed.edges(data="weight")) == sorted(expected.edges(data="weight"))
+    assert dict(streamed.nodes(data="prevalence")) == dict(expected.nodes(data="prevalence"))
+
+
+def network_and_graph():
+    counter = CooccurrenceCounter(co_range=1)
+    counter.add_documents([["gas", "strom", "gas", "strom"], ["gas", "gas"], ["markt", "preis"], ["gas", "strom"]])
+    network = counter.to_network()
+    return network, network.to_graph()
+
+
+def test_create_wcn_keeps_its_inverted_isolates_flag():
+    texts = [["gas", "strom", "gas", "strom"], ["markt", "preis"]]
+
+    assert set(textgraph.create_wcn(texts, co_range=1)) == {"gas", "strom"}
+    assert set(textgraph.create_wcn(texts, co_range=1, remove_isolates=True)) == {"gas", "strom", "markt", "preis"}
+
+
+@pytest.mark.parametrize("link_filter", [1, 2, 3])
+@pytest.mark.parametrize("remove_isolates", [True, False])
+def test_filters_agree(link_filter, remove_isolates):
+    network, G = network_and_graph()
+    expected = nx.Graph()
+    expected.add_nodes_from(G)
+    expected.add_weighted_edges_from((u, v, w) for u, v, w in G.edges(data="weight") if w >= link_filter)
+    if remove_isolates:
+        expected.remove_nodes_from(list(nx.isolates(expected)))
+
+    filtered = network.filter(link_filter=link_filter, remove_isolates=remove_isolates)
+    for graph in [
+        textgraph.create_wcn_from_network(network, link_filter=link_filter, remove_isolates=remove_isolates),
+        filtered.to_graph(),
+        textgraph.filter_wcn_view(G, link_filter=link_filter, remove_isolates=remove_isolates),
+    ]:
+        assert set(graph) == set(expected)
+        assert sorted(graph.edges(data="weight")) == sorted(expected.edges(data="weight"))
+    assert filtered.number_of_edges() == expected.number_of_edges()
+    # The network itself is unchanged
+    assert network.number_of_edges() == G.number_of_edges()
+
+
+def test_ego_index_is_reused_without_reading_links(edge_counting_graph):
+    G = edge_counting_graph
+    index = textgraph.get_ego_index(G)
+    reads = G.edge_reads
+
+    for _ in range(3):
+        assert textgraph.get_ego_index(G) is index
+    assert G.edge_reads == reads
+
+    bump_version(G)
+    assert textgraph.get_ego_index(G) is not index
@@ -0,0 +1,94 @@
+import random
+from collections import Counter
+import numpy as np
+import pytest
+import textgraph
+import textmetrics
+
+
+def legacy_calculate_prevalence(texts, reverse=True):
+    """calculatePrevalence of the original textmetrics."""
+    countPR = Counter()
+    for t in texts:
+        countPR.update(Counter(t))
+    avgPR = np.mean(list(countPR.values()))
+    stdPR = np.std(list(countPR.values()))
+    prevalence = {}
+    for t in texts:
+        for kw in t:
+            prevalence[kw] = (countPR[kw] - avgPR) / stdPR
+    return {k: v for k, v in sorted(prevalence.items(), key=lambda item: item[1], reverse=reverse)}
+
+
+def random_texts(seed, n_texts=40, vocabulary=60):
+    rng = random.Random(seed)
+    return [[f"w{int(rng.paretovariate(1.2)) % vocabulary}" for _ in range(rng.randint(0, 25))] for _ in range(n_texts)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("reverse", [True, False])
+def test_prevalence_matches_legacy_values_and_order(seed, reverse):
+    texts = random_texts(seed)
+
+    expected = legacy_calculate_prevalence(texts, reverse=reverse)
+    actual = textmetrics.calculatePrevalence(texts, reverse=reverse)
+    # Ties keep the order of first occurrence
+    assert list(actual) == list(expected)
+    assert list(actual.values()) == pytest.approx(list(expected.values()), rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("k", [1, 5, 20, 100])
+def test_top_k_matches_stable_full_sort(seed, k):
+    # Few distinct values, so the k-th score is usually tied
+    scores = np.random.default_rng(seed).integers(0, 8, size=50).astype(np.float64)
+
+    expected = np.argsort(-scores, kind="stable")[:k]
+    assert textmetrics._topK(scores, k).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_extract_keywords_matches_full_sort(seed):
+    texts = random_texts(seed)
+    G = textgraph.create_wcn(texts, co_range=2, link_filter=1)
+
+    keywords = textmetrics.extractKeywords(G, texts, k=10, rank_by=["prevalence"], metrics=["prevalence", "diversity"], parallel=False)
+    nodes = list(G)
+    prevalence = np.array([G.nodes[n]["prevalence"] for n in nodes])
+    expected = [nodes[i] for i in np.argsort(-prevalence, kind="stable")[:10]]
+    assert list(keywords.index) == expected
+    assert list(keywords.columns) == ["prevalence", "diversity"]
+
+
+def metrics_graph(seed=0):
+    texts = random_texts(seed)
+    return textgraph.create_wcn(texts, co_range=2, link_filter=1), texts
+
+
+def test_text_metrics_columns_and_sbs():
+    G, texts = metrics_graph()
+
+    metrics = textmetrics.calculateTextMetrics(G, texts, parallel=False, calc_sbs=True)
+    assert list(metrics.columns) == ["prevalence", "diversity", "connectivity", "sbs"]
+    assert list(metrics.index) == sorted(G, key=lambda n: -G.nodes[n]["prevalence"])
+    expected = metrics["prevalence"] + metrics["diversity"] + metrics["connectivity"]
+    assert metrics["sbs"].to_numpy() == pytest.approx(expected.to_numpy())
+
+    without = textmetrics.calculateTextMetrics(G, texts, parallel=False, calc_connectivity=False)
+    assert list(without.columns) == ["prevalence", "diversity"]
+
+
+def test_sbs_needs_connectivity():
+    G, texts = metrics_graph()
+    with pytest.raises(ValueError):
+        textmetrics.calculateTextMetrics(G, texts, parallel=False, calc_connectivity=False, calc_sbs=True)
+
+
+def test_text_metrics_dtype():
+    G, texts = metrics_graph()
+
+    full = textmetrics.calculateTextMetrics(G, texts, parallel=False, calc_sbs=True)
+    half = textmetrics.calculateTextMetrics(G, texts, parallel=False, calc_sbs=True, dtype=np.float32)
+    assert set(half.dtypes) == {np.dtype(np.float32)}
+    assert list(half.index) == list(full.index)
+    assert half.to_numpy() == pytest.approx(full.to_numpy(), rel=1e-6, abs=1e-6)
@@ -0,0 +1,97 @@
+import re
+import random
+import pytest
+from textgraph import clean_texts
+from tokenizer import StemCache, Tokenizer
+
+
+STOPWORDS = ["und", "der", "die", "das", "the", "and", "of", "to", "in", "ist", "für"]
+
+WORDS = STOPWORDS + ["enron", "gas", "Strom", "Vertrag", "meeting", "Übergabe", "a", "I", "x2", "2021", "_id", "naïve", "straße", "http", "www", "NEWS"]
+PIECES = [" ", "  ", "\n", "\n\n", " \n ", "\t", ".", ",", "!", "?", "'", "‘", "-", "(", ")", "/", ":", "http://enron.com/x?y=1", "www.enron.com", "https:", "mail@enron.com"]
+
+
+def legacy_clean_texts(texts, stopwords):
+    """The cleaning steps of the original textgraph.clean_texts, one regex pass after another."""
+    stopw = list(stopwords) + ["‘"]
+    texts = [t.lower() for t in texts]
+    texts = [re.sub(r"http\S+", " ", t) for t in texts]
+    texts = [re.sub(r"www\S+", " ", t) for t in texts]
+    texts = [re.sub(r"[^\w\s]", "", t) for t in texts]
+    texts = [re.sub(r"\b\w{1}\b", " ", t) for t in texts]
+    pattern = re.compile(r"\b(" + r"|".join(stopw) + r")\b\s*")
+    texts = [pattern.sub(" ", t) for t in texts]
+    texts = [re.sub(" +", " ", t) for t in texts]
+    texts = [t.replace("\n", "") for t in texts]
+    return [t.split() for t in texts]
+
+
+def random_text(rng):
+    parts = []
+    for _ in range(rng.randint(0, 40)):
+        parts.append(rng.choice(WORDS) if rng.random() < 0.6 else rng.choice(PIECES))
+        if rng.random() < 0.5:
+            parts.append(" ")
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_tokenize_matches_legacy_cleaning(seed):
+    rng = random.Random(seed)
+    texts = [random_text(rng) for _ in range(150)]
+
+    assert clean_texts(texts, STOPWORDS) == legacy_clean_texts(texts, STOPWORDS)
+
+
+def test_tokenize_all_in_parallel_keeps_order():
+    rng = random.Random(0)
+    texts = [random_text(rng) for _ in range(200)]
+    tokenizer = Tokenizer(STOPWORDS)
+
+    assert tokenizer.tokenize_all(texts, n_jobs=2, chunksize=7) == [tokenizer.tokenize(t) for t in texts]
+
+
+def test_uppercase_stopwords_are_matched_case_insensitive():
+    assert Tokenizer(["Enron"]).tokenize("ENRON und Enron gas") == ["und", "gas"]
+
+
+class CountingStemmer:
+    def __init__(self):
+        self.calls = []
+
+    def stem(self, word):
+        self.calls.append(word)
+        return word[:3]
+
+
+def test_stem_cache_evicts_the_least_recently_used_word():
+    stemmer = CountingStemmer()
+    cache = StemCache(stemmer, maxsize=2)
+    for word in ["gaspreis", "strompreis", "gaspreis", "markt", "strompreis"]:
+        cache.stem(word)
+
+    assert stemmer.calls == ["gaspreis", "strompreis", "markt", "strompreis"]
+    assert cache.cache_info() == {"hits": 1, "misses": 4, "maxsize": 2, "currsize": 2}
+
+
+def test_stem_cache_round_trip(tmp_path):
+    path = str(tmp_path / "stems.json")
+    cache = StemCache(CountingStemmer(), path=path)
+    assert not cache.unsaved
+    for word in ["gaspreis", "strompreis", "markt"]:
+        cache.stem(word)
+    assert cache.unsaved
+    cache.save()
+    assert not cache.unsaved
+
+    stemmer = CountingStemmer()
+    loaded = StemCache(stemmer, maxsize=2, path=path)
+    # Least recently used first, so only the last two words are kept
+    assert [loaded.stem(w) for w in ["strompreis", "markt"]] == ["str", "mar"]
+    assert stemmer.calls == []
+    assert not loaded.unsaved
+
+
+def test_stem_cache_without_path_cannot_be_saved():
+    with pytest.raises(ValueError):
+        StemCache(CountingStemmer()).save()
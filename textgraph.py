@@ -1,10 +1,13 @@
+import weakref
+import numpy as np
 import pandas as pd
 import networkx as nx
-import string
-import re
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import graphtools
-from textmetrics import calculatePrevalence
+import layout
+from tokenizer import Tokenizer
+from cooccurrence import CooccurrenceCounter, graph_version
 
 from collections import Counter
 
@@ -17,149 +20,121 @@ def load_df_for_texts(path, text_col):
     return df
 
 
+def iter_texts_from_csv(path, text_col, chunksize=10000, drop_duplicates=True):
+    """
+    Lazily reads the texts of a csv file from path in chunks of **chunksize** rows.
+    With drop_duplicates, only a hash of each distinct text is kept in memory.
+    """
+    seen = set()
+    for chunk in pd.read_csv(path, usecols=[text_col], chunksize=chunksize):
+        for text in chunk[text_col].dropna():
+            if drop_duplicates:
+                key = hash(text)
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield text
+
+
 def filter_person(df, person):
-    """Filters DataFrame for E-Mail Exchange between given addresses."""
-    result = pd.DataFrame(columns=df.columns)
-    for pers1 in person:
-        for pers2 in person:
-            if pers1 != pers2:
-                mails = df[(df["From"] == pers1) & (df["To"] == pers2)]
-                result = result.append(mails)
-    return result
+    """Filters DataFrame for E-Mail Exchange between given addresses, ordered by sender and recipient as in **person**."""
+    rank = {p: i for i, p in enumerate(dict.fromkeys(person))}
+    mails = df[df["From"].isin(rank) & df["To"].isin(rank) & (df["From"] != df["To"])]
+
+    # Stable sort: within a pair the mails keep the order of df
+    order = np.lexsort((mails["To"].map(rank).to_numpy(), mails["From"].map(rank).to_numpy()))
+    return mails.iloc[order]
 
 
 def clean_texts(texts, stopwords, **kwargs):
     """
     Applies cleaning steps on texts.
     texts is a list of strings, one for each e-mail analyzed.
+    stopwords can be any iterable of words, its size does not affect the cleaning time.
+    All steps (lowercase, urls, punctuation, single letters, stopwords, whitespaces,
+    linebreaks, tokenization and optional stemming) run in one pass per text, see tokenizer.Tokenizer.
+    Optional kwargs: stemmer, n_jobs (number of processes, <= 0 for all cores), chunksize (texts per task)
+    and sentences (each text becomes a list of tokenized sentences, for create_wcn(..., co_range="sentence")).
     """
-    # Define stopwords
-    stopw = list(stopwords) + ["‘"]
+    tokenizer = Tokenizer(stopwords=stopwords, stemmer=kwargs.get("stemmer", None))
 
-    print("Convert to lowercase")
-    texts = [t.lower() for t in texts]
+    print("Clean and tokenize text documents (becomes a list of lists)")
+    texts = tokenizer.tokenize_all(texts, n_jobs=kwargs.get("n_jobs", 1), chunksize=kwargs.get("chunksize", None), sentences=kwargs.get("sentences", False))
 
-    print("Remove words that start with HTTP")
-    texts = [re.sub(r"http\S+", " ", t) for t in texts]
-
-    print("Remove words that start with WWW")
-    texts = [re.sub(r"www\S+", " ", t) for t in texts]
+    return texts
 
-    print("Remove punctuation")
-    texts = [re.sub(r"[^\w\s]", "", t) for t in texts]
 
-    print("Remove words made of single letters")
-    texts = [re.sub(r"\b\w{1}\b", " ", t) for t in texts]
+def iter_clean_texts(texts, stopwords, **kwargs):
+    """
+    Lazy version of clean_texts, yields the tokens of one text at a time.
+    texts can be any iterable of strings, e.g. iter_texts_from_csv.
+    """
+    tokenizer = Tokenizer(stopwords=stopwords, stemmer=kwargs.get("stemmer", None))
+    tokenize = tokenizer.tokenize_sentences if kwargs.get("sentences", False) else tokenizer.tokenize
+    for text in texts:
+        yield tokenize(text)
 
-    print("Remove stopwords")
-    pattern = re.compile(r"\b(" + r"|".join(stopw) + r")\b\s*")
-    texts = [pattern.sub(" ", t) for t in texts]
 
-    print("Remove additional whitespaces")
-    texts = [re.sub(" +", " ", t) for t in texts]
+def create_wcn(texts, co_range=0, link_filter=2, remove_isolates=False):
+    """
+    Creates Word Co-Occurrence Graph from texts.
+    texts can be any iterable of tokenized texts, e.g. iter_clean_texts: they are counted one at a time,
+    so memory is bounded by the vocabulary, not by the corpus.
+    co_range is the window of co-occurring words for each text: a number k for the next k words,
+    0 or "document" for the whole text and "sentence" for each sentence (texts from clean_texts(..., sentences=True)).
+    As before, words without links are removed unless remove_isolates is set.
+    """
+    network = create_word_network(texts, co_range=co_range)
 
-    print("Remove Linebreaks")
-    texts = [t.replace("\n", "") for t in texts]
+    return create_wcn_from_network(network, link_filter=link_filter, remove_isolates=not remove_isolates)
 
-    print("Tokenize text documents (becomes a list of lists)")
-    texts = [t.split() for t in texts]
 
-    stemmer = kwargs.get("stemmer", None)
-    if stemmer:
-        print("Stemming")
-        texts = [[stemmer.stem(w) for w in t] for t in texts]
+def create_word_network(texts, co_range=0):
+    """
+    Counts the Word Co-Occurrences of texts into an unfiltered cooccurrence.WordNetwork,
+    a sparse matrix over int word ids. co_range is the same as in create_wcn.
+    """
+    counter = CooccurrenceCounter(co_range=co_range)
+    counter.add_documents(texts)
+    print("Anzahl Texte:", counter.n_documents)
 
-    return texts
+    return counter.to_network()
 
 
-def create_wcn(texts, co_range=0, link_filter=2, remove_isolates=False):
-    """Creates Word Co-Occurrence Graph from texts."""
-    # Create an undirected Network Graph
-    G = nx.Graph()
-
-    # Each word is a network node
-    prevalence = calculatePrevalence(texts)
-
-    for word in prevalence.keys():
-        G.add_node(word, prevalence=prevalence[word])
-
-    # Add links based on co-occurrences
-    for doc in texts:
-        w_list = []
-        length = len(doc)
-
-        if co_range == 0:
-            co_range = length  # Betrachtung der gesamten Mail
-
-        for k, w in enumerate(doc):
-            # Define range, based on document length
-            if (k + co_range) >= length:
-                superior = length
-            else:
-                superior = k + co_range + 1
-            # Create the list of co-occurring words
-            if k < length - 1:
-                for i in range(k + 1, superior):
-                    linked_word = doc[i].split()
-                    w_list = w_list + linked_word
-            # If the list is not empty, create the network links
-            if w_list:
-                for p in w_list:
-                    if G.has_edge(w, p):
-                        G[w][p]["weight"] += 1
-                    else:
-                        G.add_edge(w, p, weight=1)
-            w_list = []
-
-    # Create a new Graph which has only links above
-    # the minimum co-occurrence threshold
-    G_filtered = nx.Graph()
-    G_filtered.add_nodes_from(G.nodes(data=True))
-    for u, v, data in G.edges(data=True):
-        if data["weight"] >= link_filter:
-            G_filtered.add_edge(u, v, weight=data["weight"])
-
-    if remove_isolates:
-        print("No. of Nodes:", G_filtered.number_of_nodes(), "No. of Edges:", G_filtered.number_of_edges())
-        return G_filtered
-
-    # Optional removal of isolates
-    isolates = set(nx.isolates(G_filtered))
-
-    G_filtered.remove_nodes_from(isolates)
+def create_wcn_from_network(network, link_filter=2, remove_isolates=True):
+    """
+    Creates Word Co-Occurrence Graph with only the links of **network** above the minimum co-occurrence threshold,
+    with remove_isolates without the words that have no link left.
+    Links are pruned while the Graph is built, so changing link_filter needs neither a recount nor a copy of the network.
+    """
+    G = network.to_graph(link_filter=link_filter, remove_isolates=remove_isolates)
 
     # Check the resulting graph (for small test graphs)
-    print("Original Network\nNo. of Nodes:", G.number_of_nodes(), "No. of Edges:", G.number_of_edges())
-    print("Filtered Network\nNo. of Nodes:", G_filtered.number_of_nodes(), "No. of Edges:", G_filtered.number_of_edges())
-    return G_filtered
+    print("Original Network\nNo. of Nodes:", network.number_of_nodes(), "No. of Edges:", network.number_of_edges())
+    print("Filtered Network\nNo. of Nodes:", G.number_of_nodes(), "No. of Edges:", G.number_of_edges())
+    return G
 
 
-def show_ego_of_word(G, node, path="textgraph.png", radius=1, min_weight=1, figsize=(20, 15)):
-    """Visualizes the ego graph of **node** in **G**."""
-    ego = nx.ego_graph(G, node, radius=radius, center=True, undirected=False)
-    ego.remove_edges_from(nx.selfloop_edges(ego))
+def filter_wcn_view(G, link_filter=2, remove_isolates=True):
+    """
+    Returns a read-only view of the Word Co-Occurrence Graph **G** with only links above the minimum co-occurrence threshold.
+    Nothing is copied, so an existing Graph can be re-thresholded cheaply.
+    """
+    if not remove_isolates:
+        return nx.subgraph_view(G, filter_edge=lambda u, v: G[u][v]["weight"] >= link_filter)
 
-    # Falls man nochmal Filtern will
-    if min_weight > 1:
-        ego.remove_edges_from([(u, v, d) for u, v, d in ego.edges(data=True) if d["weight"] < min_weight])
-        component = nx.node_connected_component(ego, node)
-        to_remove = component.symmetric_difference(set(G.nodes))
-        ego.remove_nodes_from(to_remove)
+    linked = set()
+    for u, v, weight in G.edges.data("weight"):
+        if weight >= link_filter:
+            linked.add(u)
+            linked.add(v)
+    return nx.subgraph_view(G, filter_node=linked.__contains__, filter_edge=lambda u, v: G[u][v]["weight"] >= link_filter)
 
-    print("No. of Nodes:", ego.number_of_nodes(), "No. of Edges:", ego.number_of_edges())
-    colors = graphtools.color_nodes(G=ego, ego_node=node)
-    plt.figure(figsize=figsize)
-    pos = nx.spring_layout(ego, seed=42, weight="weight")
-    # labels = nx.draw_networkx_labels(ego, pos=pos, font_color="black")
-    # edges = nx.draw_networkx_edges(ego, pos=pos, alpha=0.5)
-
-    # Berechnung der Knotengröße
-    occurrences = [oc for d in ego.nodes() for oc in dict(ego.nodes(data=True))[d].values()]
-    max_occurrence = max(occurrences)
-    normalized_occurrence = [oc / max_occurrence for oc in occurrences]
-    node_size = [5000 * oc for oc in normalized_occurrence]
-
-    nx.draw(ego, pos=pos, node_color=colors, with_labels=True, edge_color="black", node_size=node_size)
+
+def show_ego_of_word(G, node, path="textgraph.png", radius=1, min_weight=1, figsize=(20, 15)):
+    """Visualizes the ego graph of **node** in **G**."""
+    fig, ax = plt.subplots(figsize=figsize)
+    _draw_ego_of_word(G, node, ax=ax, radius=radius, min_weight=min_weight)
     plt.show()
 
 
@@ -171,49 +146,140 @@ def get_figure_ego_of_word(
     min_weight=1,
     figsize=(20, 15),
 ):
-    """Visualizes the ego graph of **node** in **G**."""
-    fig, ax = plt.subplots()
-
-    fig.set_figwidth(figsize[0])
-    fig.set_figheight(figsize[1])
+    """
+    Visualizes the ego graph of **node** in **G** and returns the figure.
+    The figure is not registered with pyplot, so it is freed with its last reference (e.g. after st.write in the app).
+    """
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    _draw_ego_of_word(G, node, ax=ax, radius=radius, min_weight=min_weight)
+    return fig
 
-    ego = nx.ego_graph(G, node, radius=radius, center=True, undirected=False)
-    ego.remove_edges_from(nx.selfloop_edges(ego))
 
-    # Falls man nochmal Filtern will
-    if min_weight > 1:
-        ego.remove_edges_from([(u, v, d) for u, v, d in ego.edges(data=True) if d["weight"] < min_weight])
-        component = nx.node_connected_component(ego, node)
-        to_remove = component.symmetric_difference(set(G.nodes))
-        ego.remove_nodes_from(to_remove)
+def _draw_ego_of_word(G, node, ax, radius=1, min_weight=1):
+    """Draws the ego graph of **node** in one pass onto **ax**: one collection each for edges and nodes, then the labels."""
+    # Falls man nochmal Filtern will: nur Kanten ab min_weight, nur mit node verbundene Wörter
+    ego = get_ego_index(G).ego(node, radius=radius, min_weight=min_weight)
 
     print("No. of Nodes:", ego.number_of_nodes(), "No. of Edges:", ego.number_of_edges())
     colors = graphtools.color_nodes(G=ego, ego_node=node)
-    plt.figure(figsize=figsize)
-    pos = nx.spring_layout(ego, seed=42, weight="weight")
-    labels = nx.draw_networkx_labels(ego, pos=pos, font_color="black")
-    edges = nx.draw_networkx_edges(ego, pos=pos, alpha=0.5)
+    # Layout aus dem Cache, bei geändertem min_weight ausgehend vom letzten Layout des Egos
+    pos = layout.cached_layout(G, graph=ego, node=node, radius=radius, min_weight=min_weight)
 
-    occurrences = [oc for d in ego.nodes() for oc in dict(ego.nodes(data=True))[d].values()]
-    max_occurrence = max(occurrences)
-    normalized_occurrence = [oc / max_occurrence for oc in occurrences]
-    node_size = [5000 * oc for oc in normalized_occurrence]
+    nx.draw_networkx_edges(ego, pos=pos, edge_color="black", ax=ax)
+    nx.draw_networkx_nodes(ego, pos=pos, node_color=colors, node_size=_node_sizes(ego), ax=ax)
+    nx.draw_networkx_labels(ego, pos=pos, ax=ax)
 
-    nx.draw_networkx(ego, pos=pos, node_color=colors, with_labels=True, edge_color="black", node_size=node_size, ax=ax)
 
-    return fig
+def _node_sizes(ego, max_size=5000, min_size=100):
+    """Node sizes proportional to the prevalence of the words, at least min_size so words below average stay visible."""
+    prevalence = np.array([p for _, p in ego.nodes(data="prevalence", default=1)], dtype=np.float64)
+    if len(prevalence) == 0 or prevalence.max() <= 0:
+        return np.full(len(prevalence), max_size, dtype=np.float64)
+    return np.clip(max_size * prevalence / prevalence.max(), min_size, None)
 
 
-def recommend_min_weight(G, node, radius):
-    # expected ideal edge number:
-    n_edges = 70
-    ego = nx.ego_graph(G, node, radius=radius, center=True, undirected=False)
-    ego.remove_edges_from(nx.selfloop_edges(ego))
+def recommend_min_weight(G, node, radius, n_edges=70):
+    """Recommends the minimum weight for the ego graph of **node** to show about **n_edges** edges, 1 if it has fewer edges."""
+    return get_ego_index(G).recommend_min_weight(node, radius=radius, n_edges=n_edges)
 
-    component = nx.node_connected_component(ego, node)
-    to_remove = component.symmetric_difference(set(G.nodes))
-    ego.remove_nodes_from(to_remove)
 
-    sorted_edges = sorted(ego.edges(data=True), key=lambda t: t[2].get("weight", 1), reverse=True)
-    recommendation = sorted_edges[n_edges][2]["weight"]
-    return recommendation - 1
+class EgoIndex:
+    """
+    Answers ego graph queries on a word network in time proportional to the size of the ego, not of the graph.
+    The neighbours of each word are sorted by decreasing edge weight on first use, so edges below a
+    minimum weight are cut off by a binary search. Use get_ego_index to share one index per graph.
+    """
+
+    def __init__(self, G, weight="weight"):
+        self.G = G
+        self.weight = weight
+        self._neighbors = {}
+
+    def neighbors(self, node, min_weight=None):
+        """Returns the neighbours of **node** (without itself) and the array of edge weights, by decreasing weight."""
+        if node not in self._neighbors:
+            adj = self.G.adj[node]
+            nbrs = [v for v in adj if v != node]
+            weights = np.array([adj[v].get(self.weight, 1) for v in nbrs], dtype=np.float64)
+            order = np.argsort(-weights, kind="stable")
+            self._neighbors[node] = ([nbrs[i] for i in order.tolist()], weights[order])
+
+        nbrs, weights = self._neighbors[node]
+        if min_weight is None:
+            return nbrs, weights
+        n = int(np.searchsorted(-weights, -min_weight, side="right"))
+        return nbrs[:n], weights[:n]
+
+    def ego_nodes(self, node, radius=1):
+        """Returns the words within **radius** edges of **node**, in order of their distance."""
+        seen = {node: None}
+        frontier = [node]
+        for _ in range(radius):
+            next_frontier = []
+            for u in frontier:
+                for v in self.neighbors(u)[0]:
+                    if v not in seen:
+                        seen[v] = None
+                        next_frontier.append(v)
+            frontier = next_frontier
+        return list(seen)
+
+    def ego(self, node, radius=1, min_weight=1):
+        """
+        Returns the ego graph of **node** like nx.ego_graph, without self loops.
+        With min_weight > 1 only edges with at least this weight are kept, and only the words still connected to **node**.
+        """
+        within = set(self.ego_nodes(node, radius=radius))
+        threshold = min_weight if min_weight > 1 else None
+
+        # Words connected to node by the remaining edges inside the ego
+        component = {node: None}
+        stack = [node]
+        while stack:
+            u = stack.pop()
+            for v in self.neighbors(u, threshold)[0]:
+                if v in within and v not in component:
+                    component[v] = None
+                    stack.append(v)
+
+        ego = nx.Graph()
+        ego.add_nodes_from((n, self.G.nodes[n].copy()) for n in component)
+        for u in component:
+            ego.add_edges_from((u, v, self.G.adj[u][v].copy()) for v in self.neighbors(u, threshold)[0] if v in component)
+        return ego
+
+    def recommend_min_weight(self, node, radius=1, n_edges=70):
+        """
+        Recommends the minimum weight for the ego graph of **node** to show about **n_edges** edges:
+        one less than the weight of the edge after the n_edges heaviest. Returns 1 (no filter) if the ego has fewer edges.
+        """
+        within = set(self.ego_nodes(node, radius=radius))
+        weights = []
+        for u in within:
+            nbrs, w = self.neighbors(u)
+            weights.append(w[[v in within for v in nbrs]])
+
+        # Each edge is seen from both ends, so the n-th heaviest edge is at position 2n
+        weights = np.concatenate(weights)
+        if len(weights) <= 2 * n_edges:
+            return 1
+        recommendation = -np.partition(-weights, 2 * n_edges)[2 * n_edges]
+        return max(1, int(recommendation) - 1)
+
+
+# Ego indices per graph, dropped together with the graph
+_ego_indices = weakref.WeakKeyDictionary()
+
+
+def get_ego_index(G):
+    """
+    Returns the EgoIndex of G, a new one once the version of G changed. The version check is O(1) and does not read G,
+    so a Graph changed in place needs cooccurrence.bump_version (the Graph of an IncrementalWordNetwork does it itself).
+    """
+    version = graph_version(G)
+    cached = _ego_indices.get(G)
+    if cached is None or cached[0] != version:
+        cached = (version, EgoIndex(G))
+        _ego_indices[G] = cached
+    return cached[1]
@@ -3,83 +3,219 @@ import pandas as pd
 import networkx as nx
 import graphmetrics
 from collections import Counter
-from distinctiveness.dc import distinctiveness
-
-
-def calculateTextMetrics(G, tokenized_texts, parallel=True, calc_connectivity=True):
-    prevalence = calculatePrevalence(texts=tokenized_texts)
-    diversity = calculateDiversity(G=G, reverse=False)
-
-    metrics = pd.DataFrame.from_dict(prevalence, orient="index", columns=["prevalence"])
-    metrics["diversity"] = metrics.index.map(diversity)
-
+import centrality
+from cooccurrence import WordNetwork
+from metricscache import graph_fingerprint
+
+
+def calculateTextMetrics(G, tokenized_texts=None, parallel=True, calc_connectivity=True, calc_sbs=False, dtype=np.float64, cache=None, **kwargs):
+    # kwargs are passed to calculateConnectivity, e.g. time_budget for an approximated connectivity
+    # G can be a networkx Graph or a cooccurrence.WordNetwork
+    # Prevalence is reused from the nodes of G (see textgraph.create_wcn), texts are only counted if it is missing
+    # calc_sbs adds the Semantic Brand Score, the sum of the standardized prevalence, diversity and connectivity,
+    # so it needs calc_connectivity
+    # dtype of the columns, e.g. np.float32 to halve the memory for large vocabularies
+    # With a metricscache.MetricsCache, the metrics of an identical graph are only calculated once
+    if calc_sbs and not calc_connectivity:
+        raise ValueError("calc_sbs needs calc_connectivity, the Semantic Brand Score includes the connectivity")
+    if cache is not None:
+        texts = tokenized_texts if _nodePrevalence(G) is None else None
+        params = dict(calc_connectivity=calc_connectivity, calc_sbs=calc_sbs, dtype=np.dtype(dtype).name, **kwargs)
+        key = graph_fingerprint(G, texts=texts, metric="text_metrics", **params)
+        return cache.get_or_compute(key, lambda: calculateTextMetrics(G, tokenized_texts, parallel=parallel, **params))
+
+    # All metrics are arrays aligned with the words of the prevalence, one row per word in order of decreasing prevalence
+    prevalence = _nodePrevalence(G)
+    if prevalence is None:
+        prevalence = _standardizedCounts(_countTokens(tokenized_texts))
+    words, prevalence = prevalence
+    order = np.argsort(-prevalence, kind="stable")
+
+    columns = {"prevalence": prevalence}
+    columns["diversity"] = _aligned(words, *_diversityScores(G))
     if calc_connectivity:
-        connectivity = calculateConnectivity(G=G, parallel=parallel)
-        metrics["connectivity"] = metrics.index.map(connectivity)
+        columns["connectivity"] = _aligned(words, *_connectivityScores(G, parallel=parallel, **kwargs))
+    if calc_sbs:
+        columns["sbs"] = sum(columns.values())
 
-    return metrics
+    index = pd.Index(np.asarray(words, dtype=object)[order])
+    return pd.DataFrame({name: values[order].astype(dtype, copy=False) for name, values in columns.items()}, index=index)
 
 
 def calculatePrevalence(texts, reverse=True):
-    # Create a dictionary with frequency counts for each word
+    # Create a dictionary with frequency counts for each word, in one pass over all tokens
+    return calculatePrevalenceFromCounts(_countTokens(texts), reverse=reverse)
+
+
+def calculatePrevalenceFromCounts(countPR, reverse=True):
+    # Calculate standardized Prevalence for all keywords at once, in order of first occurrence
+    keys, prevalence = _standardizedCounts(countPR)
+    return _sortedScores(keys, prevalence, reverse=reverse)
+
+
+def calculateDiversity(G, reverse=True, cache=None):
+    if cache is not None:
+        key = graph_fingerprint(G, metric="diversity", reverse=reverse)
+        return cache.get_or_compute(key, lambda: calculateDiversity(G, reverse=reverse))
+
+    nodes, diversity = _diversityScores(G)
+    return _sortedScores(nodes, diversity, reverse=reverse)
+
+
+def calculateConnectivity(G, parallel=True, reverse=True, backend="networkx", k=None, epsilon=None, time_budget=None, adaptive=False, cache=None):
+    """
+    Standardized betweenness centrality of each word.
+    backend "networkx" uses networkx (in parallel for large graphs), "csr" the compiled
+    shortest paths on the adjacency arrays of centrality.betweenness_centrality.
+    If one of k (number of sampled words), epsilon (error bound), time_budget (seconds) or adaptive
+    (stop once the ranking is stable) is given, betweenness is approximated from sampled words.
+    With a metricscache.MetricsCache as **cache**, the result for an identical graph and parameters is only calculated once.
+    """
+    if backend not in ("networkx", "csr"):
+        raise ValueError("backend must be 'networkx' or 'csr'.")
+    params = dict(backend=backend, k=k, epsilon=epsilon, time_budget=time_budget, adaptive=adaptive)
+    if cache is not None:
+        key = graph_fingerprint(G, metric="connectivity", reverse=reverse, **params)
+        return cache.get_or_compute(key, lambda: calculateConnectivity(G, parallel=parallel, reverse=reverse, **params))
+
+    nodes, connectivity = _connectivityScores(G, parallel=parallel, **params)
+    return _sortedScores(nodes, connectivity, reverse=reverse)
+
+
+def extractKeywords(G, tokenized_texts=None, k=20, rank_by=("prevalence",), metrics=("prevalence", "diversity"), parallel=True, cache=None, **kwargs):
+    """
+    Returns the top **k** keywords among the words of G as DataFrame with a column per metric, best first.
+    Keywords are ranked by the sum of the standardized metrics in **rank_by** ("prevalence", "diversity" or "connectivity"),
+    **metrics** are the additional columns. Only the top k scores are selected and sorted, not the whole vocabulary.
+    kwargs are passed to calculateConnectivity, e.g. backend or time_budget.
+    """
+    columns = list(dict.fromkeys(list(metrics) + list(rank_by)))
+    unknown = set(columns) - {"prevalence", "diversity", "connectivity"}
+    if unknown:
+        raise ValueError("Unknown metrics: {}".format(", ".join(sorted(unknown))))
+    if cache is not None:
+        texts = tokenized_texts if "prevalence" in columns and _nodePrevalence(G) is None else None
+        key = graph_fingerprint(G, texts=texts, metric="keywords", k=k, rank_by=list(rank_by), metrics=columns, **kwargs)
+        return cache.get_or_compute(
+            key, lambda: extractKeywords(G, tokenized_texts, k=k, rank_by=rank_by, metrics=metrics, parallel=parallel, **kwargs)
+        )
+
+    nodes = centrality.node_list(G)
+    scorers = {
+        "prevalence": lambda: _nodePrevalence(G) or _standardizedCounts(_countTokens(tokenized_texts)),
+        "diversity": lambda: _diversityScores(G),
+        "connectivity": lambda: _connectivityScores(G, parallel=parallel, **kwargs),
+    }
+    scores = {metric: _aligned(nodes, *scorers[metric]()) for metric in columns}
+
+    top = _topK(sum(scores[metric] for metric in rank_by), k)
+    return pd.DataFrame({metric: scores[metric][top] for metric in columns}, index=[nodes[i] for i in top.tolist()])
+
+
+def _as_graph(G):
+    """Materializes the networkx Graph of a cooccurrence.WordNetwork, other graphs are returned as they are."""
+    if isinstance(G, WordNetwork):
+        return G.to_graph()
+    return G
+
+
+def _nodePrevalence(G):
+    """Returns the words and the array of their standardized prevalence stored on the nodes of G, None if a node has none."""
+    if isinstance(G, WordNetwork):
+        return G.tokens, G.prevalence
+
+    prevalence = nx.get_node_attributes(G, "prevalence")
+    if not prevalence or len(prevalence) < G.number_of_nodes():
+        return None
+    return list(prevalence.keys()), np.fromiter(prevalence.values(), dtype=float, count=len(prevalence))
+
+
+def _countTokens(texts):
     countPR = Counter()
     for t in texts:
-        countPR.update(Counter(t))
-
-    # Calculate average score and standard deviation
-    avgPR = np.mean(list(countPR.values()))
-    stdPR = np.std(list(countPR.values()))
-
-    # Calculate standardized Prevalence for each keyword
-    prevalence = {}
-    for t in texts:
-        for kw in t:
-            prevalence[kw] = (countPR[kw] - avgPR) / stdPR
+        countPR.update(t)
+    return countPR
 
-    sortedPrevalence = {k: v for k, v in sorted(prevalence.items(), key=lambda item: item[1], reverse=reverse)}
 
-    return sortedPrevalence
+def _standardizedCounts(countPR):
+    """Returns the words and the array of their standardized counts."""
+    counts = np.fromiter(countPR.values(), dtype=np.int64, count=len(countPR))
+    avgPR = np.mean(counts)
+    stdPR = np.std(counts)
+    return list(countPR.keys()), (counts - avgPR) / stdPR
 
 
-def calculateDiversity(G, reverse=True):
-    # Calculate Distinctiveness Centrality
-    DC = distinctiveness(G, normalize=False, alpha=2)
-    DIVERSITY_sequence = DC["D2"]
+def _diversityScores(G):
+    """Returns the words and the array of their standardized Distinctiveness Centrality (only D2), on the sparse adjacency matrix."""
+    nodes, A = centrality.adjacency(G)
+    DIVERSITY_sequence = centrality.distinctiveness_arrays(A, alpha=2, normalize=False, measures=["D2"])["D2"]
 
     # Calculate average score and standard deviation
-    avgDI = np.mean(list(DIVERSITY_sequence.values()))
-    stdDI = np.std(list(DIVERSITY_sequence.values()))
-    # Calculate standardized Diversity for each brand
-    diversity = {}
-    for kw in G.nodes:
-        diversity[kw] = (DIVERSITY_sequence[kw] - avgDI) / stdDI
-
-    sortedDiversity = {k: v for k, v in sorted(diversity.items(), key=lambda item: item[1], reverse=reverse)}
-
-    return sortedDiversity
-
-
-def calculateConnectivity(G, parallel=True, reverse=True):
-    # Define inverse weights, beacaus bc interprets weight as distance
-    for u, v, data in G.edges(data=True):
-        if "weight" in data and data["weight"] != 0:
-            data["inverse"] = 1 / data["weight"]
-        else:
-            data["inverse"] = 1
-
-    if parallel:
-        CONNECTIVITY_sequence = graphmetrics.betweenness_centrality_parallel(G, normalized=False, weight="inverse")
+    avgDI = np.mean(DIVERSITY_sequence)
+    stdDI = np.std(DIVERSITY_sequence)
+    return nodes, (DIVERSITY_sequence - avgDI) / stdDI
+
+
+def _connectivityScores(G, parallel=True, backend="networkx", k=None, epsilon=None, time_budget=None, adaptive=False):
+    """Returns the words and the array of their standardized betweenness centrality, see calculateConnectivity."""
+    # The csr backend reads the matrix of a WordNetwork directly, networkx needs the Graph
+    if backend != "csr":
+        G = _as_graph(G)
+
+    # bc interprets weight as distance, so the inverse weights are used without storing them on G
+    if k or epsilon or time_budget or adaptive:
+        CONNECTIVITY_sequence = graphmetrics.approximate_betweenness_centrality(
+            G,
+            weight="weight",
+            inverse=True,
+            normalized=False,
+            k=k,
+            epsilon=epsilon,
+            time_budget=time_budget,
+            adaptive=adaptive,
+            parallel=parallel,
+            seed=42,
+            backend=backend,
+        )
+    elif backend == "csr":
+        CONNECTIVITY_sequence = centrality.betweenness_centrality(G, weight="weight", normalized=False, inverse=True)
+    elif parallel:
+        CONNECTIVITY_sequence = graphmetrics.betweenness_centrality_parallel(G, normalized=False, weight=graphmetrics.inverse_weight)
     else:
-        CONNECTIVITY_sequence = nx.betweenness_centrality(G, normalized=False, weight="inverse")
+        CONNECTIVITY_sequence = nx.betweenness_centrality(G, normalized=False, weight=graphmetrics.inverse_weight)
 
+    nodes = centrality.node_list(G)
+    CONNECTIVITY_sequence = np.array([CONNECTIVITY_sequence[kw] for kw in nodes], dtype=np.float64)
     # Calculate average score and standard deviation
-    avgCO = np.mean(list(CONNECTIVITY_sequence.values()))
-    stdCO = np.std(list(CONNECTIVITY_sequence.values()))
-    # Calculate standardized Prevalence for each brand
-    connectivity = {}
-    for kw in G.nodes:
-        connectivity[kw] = (CONNECTIVITY_sequence[kw] - avgCO) / stdCO
+    avgCO = np.mean(CONNECTIVITY_sequence)
+    stdCO = np.std(CONNECTIVITY_sequence)
+    return nodes, (CONNECTIVITY_sequence - avgCO) / stdCO
+
+
+def _aligned(nodes, keys, scores):
+    """Returns the scores of **keys** in the order of **nodes**, NaN for nodes without a score."""
+    if list(keys) == list(nodes):
+        return np.asarray(scores, dtype=np.float64)
+    index = {key: i for i, key in enumerate(keys)}
+    positions = np.array([index.get(node, -1) for node in nodes], dtype=np.int64)
+    aligned = np.asarray(scores, dtype=np.float64)[positions]
+    aligned[positions < 0] = np.nan
+    return aligned
+
+
+def _topK(scores, k):
+    """Returns the positions of the k highest scores, best first. Equal scores keep their order, like in _sortedScores."""
+    if k < len(scores):
+        # All scores from the k-th highest on, ties included; usually only a few more than k
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))][:k]
 
-    sortedConnectivity = {k: v for k, v in sorted(connectivity.items(), key=lambda item: item[1], reverse=reverse)}
 
-    return sortedConnectivity
+def _sortedScores(keys, scores, reverse=True):
+    """Returns a dict of keys and scores, sorted by score. Keys with equal scores keep their order."""
+    order = np.argsort(-scores if reverse else scores, kind="stable")
+    scores = scores.tolist()
+    return {keys[i]: scores[i] for i in order.tolist()}
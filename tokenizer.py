@@ -0,0 +1,176 @@
+import re
+import os
+import json
+from collections import OrderedDict
+from multiprocessing import Pool
+
+
+class Tokenizer:
+    """
+    Cleans and tokenizes texts in a single pass per document.
+    Yields the same tokens as applying the cleaning steps of textgraph.clean_texts one after another:
+    lowercase, remove urls, punctuation, single letters and stopwords, join linebreaks, split and stem.
+    Stopwords are matched literally and case-insensitive against whole tokens.
+    """
+
+    http_pattern = re.compile(r"http\S+")
+    www_pattern = re.compile(r"www\S+")
+    punctuation_pattern = re.compile(r"[^\w\s]")
+    chunk_pattern = re.compile(r"\w+|\s+")
+    sentence_pattern = re.compile(r"[.!?]+(?=\s|$)")
+
+    def __init__(self, stopwords, stemmer=None):
+        # Texts are lowercased before matching, so the stopwords are as well.
+        # Lookup is a hash per token, its cost does not grow with the number of stopwords.
+        self.stopwords = frozenset(w.lower() for w in stopwords) | {"‘"}
+        self.stemmer = stemmer
+
+    def is_stopword(self, word):
+        """Checks whether **word** is removed as stopword."""
+        return word in self.stopwords
+
+    def tokenize(self, text):
+        """Returns the list of cleaned tokens of a single text."""
+        text = self.www_pattern.sub(" ", self.http_pattern.sub(" ", text.lower()))
+        text = self.punctuation_pattern.sub("", text)
+
+        stopwords = self.stopwords
+        tokens = []
+        token = ""
+        for chunk in self.chunk_pattern.findall(text):
+            if chunk[0].isspace():
+                # Linebreaks are removed without replacement, so only other whitespaces separate words
+                if chunk.strip("\n"):
+                    if token:
+                        tokens.append(token)
+                    token = ""
+            elif len(chunk) == 1 or chunk in stopwords:
+                # Single letters and stopwords are replaced by a whitespace
+                if token:
+                    tokens.append(token)
+                token = ""
+            else:
+                token += chunk
+        if token:
+            tokens.append(token)
+
+        if self.stemmer:
+            tokens = [self.stemmer.stem(w) for w in tokens]
+        return tokens
+
+    def tokenize_sentences(self, text):
+        """Returns the cleaned tokens of each sentence of a single text, sentences without tokens are dropped."""
+        sentences = (self.tokenize(s) for s in self.sentence_pattern.split(text))
+        return [s for s in sentences if s]
+
+    def tokenize_all(self, texts, n_jobs=1, chunksize=None, sentences=False):
+        """
+        Returns the cleaned tokens for each text (becomes a list of lists).
+        With sentences, each text becomes a list of tokenized sentences.
+        With n_jobs other than 1 the texts are distributed over a process pool (n_jobs <= 0 uses all cores),
+        the tokenizer is sent to each worker only once and the order of the texts is kept.
+        """
+        if n_jobs == 1:
+            tokenize = self.tokenize_sentences if sentences else self.tokenize
+            return [tokenize(t) for t in texts]
+
+        texts = list(texts)
+        processes = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count()
+        if chunksize is None:
+            chunksize = max(1, -(-len(texts) // (processes * 4)))
+
+        with Pool(processes=processes, initializer=_init_worker, initargs=(self,)) as p:
+            return p.map(_tokenize_sentences_in_worker if sentences else _tokenize_in_worker, texts, chunksize=chunksize)
+
+
+# Tokenizer of a worker process, set once by the pool initializer
+_worker_tokenizer = None
+
+
+def _init_worker(tokenizer):
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _tokenize_in_worker(text):
+    return _worker_tokenizer.tokenize(text)
+
+
+def _tokenize_sentences_in_worker(text):
+    return _worker_tokenizer.tokenize_sentences(text)
+
+
+class StemCache:
+    """
+    Memoizes a stemmer in a bounded LRU cache, keyed by word.
+    Wraps every object with a .stem() method (e.g. nltk's SnowballStemmer) and can be passed
+    as stemmer to textgraph.clean_texts. If **path** is given, the cache is loaded from
+    and can be saved to this json file, so repeated runs in the same language start warm.
+    unsaved tells whether new stems were added since the last save, so unchanged caches need not be written again.
+    """
+
+    def __init__(self, stemmer, maxsize=100000, path=None):
+        self.stemmer = stemmer
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._saved_misses = 0
+        self._cache = OrderedDict()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def stem(self, word):
+        """Returns the stem of **word**, calls the wrapped stemmer only for unknown words."""
+        cache = self._cache
+        try:
+            stem = cache[word]
+        except KeyError:
+            self.misses += 1
+            stem = self.stemmer.stem(word)
+            cache[word] = stem
+            if self.maxsize is not None and len(cache) > self.maxsize:
+                cache.popitem(last=False)
+            return stem
+
+        self.hits += 1
+        cache.move_to_end(word)
+        return stem
+
+    def cache_info(self):
+        """Returns hits, misses, maxsize and current size of the cache."""
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self._cache)}
+
+    @property
+    def unsaved(self):
+        """Whether stems were added since the cache was created or saved."""
+        return self.misses != self._saved_misses
+
+    def clear(self):
+        """Removes all cached stems and resets the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self._saved_misses = 0
+
+    def load(self, path=None):
+        """Loads cached stems from a json file, least recently used first."""
+        with open(self._path(path), encoding="utf-8") as f:
+            stems = json.load(f)
+
+        self._cache.update(stems)
+        while self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def save(self, path=None):
+        """Saves the cached stems to a json file."""
+        with open(self._path(path), "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, ensure_ascii=False)
+        self._saved_misses = self.misses
+
+    def _path(self, path):
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for the json file of the stem cache.")
+        return path